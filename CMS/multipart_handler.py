@@ -2,11 +2,54 @@
 Custom multipart request handler for Strawberry GraphQL
 """
 import json
-from typing import Any, Dict
-from django.http import HttpRequest
+from typing import Any, Dict, Optional, Tuple
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.http import HttpRequest, QueryDict
+from django.utils.datastructures import MultiValueDict
 
+try:
+    import orjson
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
 
-def parse_multipart_graphql_request(request: HttpRequest) -> Dict[str, Any]:
+
+# Django's default upload chunk is 64 KiB; larger chunks mean far fewer
+# parser iterations and handler calls per uploaded megabyte
+UPLOAD_CHUNK_SIZE = 256 * 2 ** 10
+
+
+class LargeChunkMemoryFileUploadHandler(MemoryFileUploadHandler):
+    """In-memory upload handler (small files) reading the body in large chunks"""
+    chunk_size = UPLOAD_CHUNK_SIZE
+
+
+class LargeChunkTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Temporary-file upload handler (large files) reading the body in large chunks"""
+    chunk_size = UPLOAD_CHUNK_SIZE
+
+
+def use_large_chunk_upload_handlers(request: HttpRequest) -> None:
+    """
+    Swap the request's upload handlers for the large-chunk variants.
+    
+    Must be called before request.POST or request.FILES is accessed.
+    """
+    request.upload_handlers = [
+        LargeChunkMemoryFileUploadHandler(request),
+        LargeChunkTemporaryFileUploadHandler(request),
+    ]
+
+
+def parse_multipart_graphql_request(
+    post_data: QueryDict,
+    files: MultiValueDict,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
     Parse GraphQL multipart request according to the spec:
     https://github.com/jaydenseric/graphql-multipart-request-spec
@@ -16,51 +59,88 @@ def parse_multipart_graphql_request(request: HttpRequest) -> Dict[str, Any]:
     - map: JSON string mapping file keys to variable paths  
     - files: uploaded files with keys matching the map
     
+    `post_data` and `files` are the request's already-parsed POST and FILES,
+    so the multipart body is only run through Django's parser once.
+    
+    Files are inserted into the operations at their mapped paths, so Upload
+    arguments of each (possibly batched) operation receive their own file.
+    They are also returned keyed by path for resolvers that read them from
+    the context.
+    
     Returns:
-    Dict with 'query', 'variables', 'operationName' keys
+    Tuple of (operations dict with 'query', 'variables', 'operationName' keys,
+    dict of uploaded files keyed by variable path)
     """
     try:
         # Get operations from POST data
-        operations_str = request.POST.get('operations')
+        operations_str = post_data.get('operations')
         if not operations_str:
             raise ValueError("Missing 'operations' field in multipart request")
         
-        operations = json.loads(operations_str)
+        operations = _loads(operations_str)
+        uploaded_files = {}
         
         # Get file mapping
-        map_str = request.POST.get('map')
+        map_str = post_data.get('map')
         if map_str:
-            files_map = json.loads(map_str)
+            files_map = _loads(map_str)
+            parents = {}
+            # Snapshot FILES as a plain dict of key -> last uploaded file
+            files_by_key = files.dict()
             
             # Map files to variables
             for file_key, paths in files_map.items():
-                uploaded_file = request.FILES.get(file_key)
-                if uploaded_file:
-                    for path in paths:
-                        _set_nested_value(operations, path, uploaded_file)
+                uploaded_file = files_by_key.get(file_key)
+                if uploaded_file is None:
+                    raise ValueError(f"File '{file_key}' missing in form data")
+                for path in paths:
+                    _set_nested_value(operations, path, uploaded_file, parents)
+                    uploaded_files[path] = uploaded_file
         
-        return operations
+        return operations, uploaded_files
         
-    except json.JSONDecodeError as e:
+    except _JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in multipart request: {str(e)}")
     except Exception as e:
         raise ValueError(f"Error parsing multipart request: {str(e)}")
 
 
-def _set_nested_value(data: Dict[str, Any], path: str, value: Any) -> None:
+def _set_nested_value(
+    data: Dict[str, Any],
+    path: str,
+    value: Any,
+    parents: Optional[Dict[str, Any]] = None,
+) -> None:
     """
     Set a value in a nested dictionary using dot notation path.
     
     Example: path="variables.profilePicture" will set data['variables']['profilePicture'] = value
+    Numeric segments index into lists, e.g. path="variables.files.0".
+    
+    If a `parents` dict is given, resolved parent containers are cached in it
+    by parent path so sibling paths (variables.files.0, variables.files.1)
+    only walk the tree once.
     """
-    keys = path.split('.')
-    current = data
+    if '.' not in path:
+        data[path] = value
+        return
+    
+    parent_path, _, last_key = path.rpartition('.')
+    current = parents.get(parent_path) if parents is not None else None
     
     # Navigate to the parent of the target key
-    for key in keys[:-1]:
-        if key not in current:
-            current[key] = {}
-        current = current[key]
+    if current is None:
+        current = data
+        for key in parent_path.split('.'):
+            if isinstance(current, list):
+                current = current[int(key)]
+            else:
+                current = current.setdefault(key, {})
+        if parents is not None:
+            parents[parent_path] = current
     
     # Set the value
-    current[keys[-1]] = value
+    if isinstance(current, list):
+        current[int(last_key)] = value
+    else:
+        current[last_key] = value
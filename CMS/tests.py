@@ -0,0 +1,247 @@
+"""
+Tests for the GraphQL endpoint's multipart handling and error status codes
+"""
+import json
+from unittest.mock import patch
+
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase
+from django.utils.datastructures import MultiValueDict
+from graphql import ExecutionResult, GraphQLError
+from strawberry.django.views import GraphQLView, TemporalHttpResponse
+
+from CMS.multipart_handler import _set_nested_value, parse_multipart_graphql_request
+from CMS.urls import CustomGraphQLView, _classify_error, _get_error_status_code
+from core.graphql.schema import schema
+
+
+UPLOAD_QUERY = 'mutation ($files: [Upload!]!) { upload(files: $files) }'
+
+
+def _post_data(operations, files_map):
+    """Build the POST QueryDict of a multipart GraphQL request"""
+    post_data = QueryDict(mutable=True)
+    post_data['operations'] = json.dumps(operations)
+    post_data['map'] = json.dumps(files_map)
+    return post_data
+
+
+class SetNestedValueTest(SimpleTestCase):
+    """Test dot-path assignment into parsed operations"""
+    
+    def test_single_segment_path(self):
+        """A path without dots sets a top-level key"""
+        data = {}
+        _set_nested_value(data, 'file', 'value')
+        self.assertEqual(data, {'file': 'value'})
+    
+    def test_nested_dict_path(self):
+        """Missing intermediate dicts are created"""
+        data = {'variables': {}}
+        _set_nested_value(data, 'variables.input.attachment', 'value')
+        self.assertEqual(data, {'variables': {'input': {'attachment': 'value'}}})
+    
+    def test_list_index_paths(self):
+        """Numeric segments index into lists, sharing the cached parent"""
+        data = {'variables': {'files': [None, None]}}
+        parents = {}
+        _set_nested_value(data, 'variables.files.0', 'first', parents)
+        _set_nested_value(data, 'variables.files.1', 'second', parents)
+        
+        self.assertEqual(data['variables']['files'], ['first', 'second'])
+        self.assertIs(parents['variables.files'], data['variables']['files'])
+    
+    def test_batched_operation_path(self):
+        """A leading index selects the operation of a batched request"""
+        data = [{'variables': {'file': None}}, {'variables': {'file': None}}]
+        _set_nested_value(data, '1.variables.file', 'value')
+        self.assertEqual(data, [{'variables': {'file': None}}, {'variables': {'file': 'value'}}])
+
+
+class ParseMultipartGraphQLRequestTest(SimpleTestCase):
+    """Test parsing of multipart GraphQL requests"""
+    
+    def test_files_in_list_variable(self):
+        """Each mapped file lands at its list index and in the returned files"""
+        first = SimpleUploadedFile('a.txt', b'a')
+        second = SimpleUploadedFile('b.txt', b'b')
+        post_data = _post_data(
+            {'query': UPLOAD_QUERY, 'variables': {'files': [None, None]}},
+            {'0': ['variables.files.0'], '1': ['variables.files.1']},
+        )
+        files = MultiValueDict({'0': [first], '1': [second]})
+        
+        operations, uploaded_files = parse_multipart_graphql_request(post_data, files)
+        
+        self.assertEqual(operations['query'], UPLOAD_QUERY)
+        self.assertEqual(operations['variables']['files'], [first, second])
+        self.assertEqual(uploaded_files, {'variables.files.0': first, 'variables.files.1': second})
+    
+    def test_one_file_mapped_to_several_paths(self):
+        """A file mapped to several paths is placed at each of them"""
+        upload = SimpleUploadedFile('a.txt', b'a')
+        post_data = _post_data(
+            [{'query': UPLOAD_QUERY, 'variables': {'file': None}}] * 2,
+            {'0': ['0.variables.file', '1.variables.file']},
+        )
+        
+        operations, uploaded_files = parse_multipart_graphql_request(
+            post_data, MultiValueDict({'0': [upload]})
+        )
+        
+        self.assertIs(operations[0]['variables']['file'], upload)
+        self.assertIs(operations[1]['variables']['file'], upload)
+        self.assertEqual(set(uploaded_files), {'0.variables.file', '1.variables.file'})
+    
+    def test_without_map(self):
+        """Requests without a map are returned unchanged with no files"""
+        post_data = QueryDict(mutable=True)
+        post_data['operations'] = json.dumps({'query': '{ __typename }'})
+        
+        operations, uploaded_files = parse_multipart_graphql_request(post_data, MultiValueDict())
+        
+        self.assertEqual(operations, {'query': '{ __typename }'})
+        self.assertEqual(uploaded_files, {})
+    
+    def test_missing_operations(self):
+        """The operations field is required"""
+        with self.assertRaises(ValueError):
+            parse_multipart_graphql_request(QueryDict(mutable=True), MultiValueDict())
+    
+    def test_invalid_json(self):
+        """Malformed operations JSON is rejected"""
+        post_data = QueryDict(mutable=True)
+        post_data['operations'] = '{not json'
+        with self.assertRaises(ValueError):
+            parse_multipart_graphql_request(post_data, MultiValueDict())
+    
+    def test_missing_map_key(self):
+        """A map entry without an uploaded file is rejected"""
+        post_data = _post_data(
+            {'query': UPLOAD_QUERY, 'variables': {'files': [None]}},
+            {'0': ['variables.files.0']},
+        )
+        with self.assertRaises(ValueError):
+            parse_multipart_graphql_request(post_data, MultiValueDict())
+
+
+class MultipartGraphQLViewTest(SimpleTestCase):
+    """Test multipart requests through the GraphQL view"""
+    
+    def test_missing_map_key_returns_400(self):
+        """A map entry without an uploaded file fails the request with 400"""
+        request = RequestFactory().post('/graphql/', data={
+            'operations': json.dumps({'query': UPLOAD_QUERY, 'variables': {'files': [None]}}),
+            'map': json.dumps({'0': ['variables.files.0']}),
+        })
+        view = CustomGraphQLView.as_view(schema=schema, multipart_uploads_enabled=True)
+        
+        response = view(request)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid multipart request', json.loads(response.content)['errors'][0]['message'])
+
+
+def _error(message, original_error=None):
+    """Build a GraphQLError as raised from a resolver"""
+    return GraphQLError(message, original_error=original_error)
+
+
+class ErrorStatusCodeTest(SimpleTestCase):
+    """Test mapping of GraphQL errors to HTTP status codes"""
+    
+    def test_exception_types(self):
+        """Django exceptions map by type, whatever their message says"""
+        cases = [
+            (PermissionDenied('Assignment not found'), 403),
+            (ObjectDoesNotExist('Invalid token'), 404),
+            (ValidationError('Access denied'), 400),
+        ]
+        for original_error, status_code in cases:
+            with self.subTest(original_error=type(original_error).__name__):
+                error = _error(str(original_error), original_error)
+                self.assertEqual(_classify_error(error), status_code)
+    
+    def test_message_keywords(self):
+        """Plain exceptions fall back to the message keywords"""
+        cases = [
+            ('Authentication required', 401),
+            ('Authentication failed: Token expired', 401),
+            ('Access denied. Required roles: FACULTY', 403),
+            ('Only students can submit assignments. Forbidden', 403),
+            ('Submission not found', 404),
+            ('Assignment matching query does not exist.', 404),
+            ('Invalid file data', 400),
+            ('Marks cannot be negative', 400),
+            ('Something went wrong', None),
+        ]
+        for message, status_code in cases:
+            with self.subTest(message=message):
+                self.assertEqual(_classify_error(_error(message, Exception(message))), status_code)
+    
+    def test_keyword_priority(self):
+        """Higher priority groups and longer keywords win when several match"""
+        cases = [
+            # 'invalid token' (401) beats 'invalid' (400)
+            ('Invalid token', 401),
+            # 404 beats 400, regardless of position in the message
+            ('Invalid reference: Subject matching query does not exist.', 404),
+            # 401 beats 403 and 404
+            ('Access denied: user not found, not authenticated', 401),
+        ]
+        for message, status_code in cases:
+            with self.subTest(message=message):
+                self.assertEqual(_classify_error(_error(message)), status_code)
+    
+    def test_first_classified_error_decides(self):
+        """Unclassifiable errors are skipped and the default is 400"""
+        cases = [
+            ([_error('Something went wrong'), _error('Submission not found')], 404),
+            ([_error('Access denied'), _error('Authentication required')], 403),
+            ([_error('Something went wrong')], 400),
+        ]
+        for errors, status_code in cases:
+            with self.subTest(messages=[error.message for error in errors]):
+                self.assertEqual(_get_error_status_code(errors), status_code)
+    
+    def test_batched_result_status(self):
+        """The first failing operation of a batch sets the response status"""
+        results = [
+            ExecutionResult(data={'ok': True}),
+            ExecutionResult(data=None, errors=[_error('Submission not found')]),
+            ExecutionResult(data=None, errors=[_error('Authentication required')]),
+        ]
+        view = CustomGraphQLView(schema=schema)
+        sub_response = TemporalHttpResponse()
+        
+        with patch.object(GraphQLView, 'execute_single', side_effect=results):
+            for _ in results:
+                view.execute_single(
+                    request=None,
+                    request_adapter=None,
+                    sub_response=sub_response,
+                    context=None,
+                    root_value=None,
+                    request_data=None,
+                )
+        
+        self.assertEqual(sub_response.status_code, 404)
+    
+    def test_successful_result_keeps_status(self):
+        """Results without errors leave the status to Strawberry"""
+        view = CustomGraphQLView(schema=schema)
+        sub_response = TemporalHttpResponse()
+        
+        with patch.object(GraphQLView, 'execute_single', return_value=ExecutionResult(data={'ok': True})):
+            view.execute_single(
+                request=None,
+                request_adapter=None,
+                sub_response=sub_response,
+                context=None,
+                root_value=None,
+                request_data=None,
+            )
+        
+        self.assertIsNone(sub_response.status_code)
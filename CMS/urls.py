@@ -19,14 +19,109 @@ from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
 from strawberry.django.views import GraphQLView
 from django.http import JsonResponse
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
 from django.conf import settings
 from django.conf.urls.static import static
-import json
-from .multipart_handler import parse_multipart_graphql_request
+import re
+import traceback
+from .multipart_handler import parse_multipart_graphql_request, use_large_chunk_upload_handlers
 
 from core.graphql.schema import schema
 
 
+# Exception types raised by resolvers mapped to HTTP status codes
+_EXCEPTION_STATUS_CODES = (
+    (PermissionDenied, 403),
+    (ObjectDoesNotExist, 404),
+    (ValidationError, 400),
+)
+
+# Error keywords mapped to HTTP status codes, in priority order
+_ERROR_KEYWORDS = (
+    # Authentication errors
+    (401, (
+        'authentication', 'not authenticated', 'permission denied',
+        'unauthorized', 'not authorized', 'token', 'invalid token'
+    )),
+    # Authorization/Permission errors
+    (403, (
+        'forbidden', 'not allowed', 'access denied',
+        'insufficient permissions', 'role'
+    )),
+    # Not found errors
+    (404, (
+        'not found', 'does not exist', 'no matching'
+    )),
+    # Validation errors (keep as 400)
+    (400, (
+        'invalid', 'required', 'validation', 'must be',
+        'cannot', 'expected'
+    )),
+)
+
+
+def _build_error_keyword_pattern(keyword_groups):
+    """
+    Compile all error keywords into one alternation with a named group per status code.
+    
+    Groups are ordered by priority and keywords within a group by length, so
+    where keywords overlap ('invalid token' vs 'invalid') the higher priority,
+    longer keyword wins.
+    """
+    alternatives = []
+    for status_code, keywords in keyword_groups:
+        keywords = sorted(keywords, key=len, reverse=True)
+        alternatives.append(
+            f"(?P<status_{status_code}>{'|'.join(re.escape(keyword) for keyword in keywords)})"
+        )
+    return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+
+_ERROR_KEYWORD_RE = _build_error_keyword_pattern(_ERROR_KEYWORDS)
+
+# Named group -> (priority, status code)
+_ERROR_KEYWORD_GROUPS = {
+    f"status_{status_code}": (priority, status_code)
+    for priority, (status_code, _) in enumerate(_ERROR_KEYWORDS)
+}
+
+
+def _classify_error_message(message):
+    """Return the HTTP status code for an error message, or None if no keyword matches"""
+    best_priority = None
+    best_status_code = None
+    
+    # Single scan of the message, keeping the highest priority match
+    for match in _ERROR_KEYWORD_RE.finditer(message):
+        priority, status_code = _ERROR_KEYWORD_GROUPS[match.lastgroup]
+        if priority == 0:
+            return status_code
+        if best_priority is None or priority < best_priority:
+            best_priority, best_status_code = priority, status_code
+    
+    return best_status_code
+
+
+def _classify_error(error):
+    """Return the HTTP status code for a GraphQLError, or None if it can't be classified"""
+    original_error = error.original_error
+    for exception_class, status_code in _EXCEPTION_STATUS_CODES:
+        if isinstance(original_error, exception_class):
+            return status_code
+    
+    # Most resolvers raise plain Exception, so fall back to the message text
+    return _classify_error_message(error.message)
+
+
+def _get_error_status_code(errors):
+    """Determine the HTTP status code for a list of GraphQL errors"""
+    for error in errors:
+        status_code = _classify_error(error)
+        if status_code is not None:
+            return status_code
+    return 400  # Default to bad request
+
+
 class CustomGraphQLView(GraphQLView):
     """Custom GraphQL view that returns proper HTTP status codes for errors and handles multipart uploads"""
     
@@ -36,82 +131,30 @@ class CustomGraphQLView(GraphQLView):
         
         if "multipart/form-data" in content_type and request.method == "POST":
             try:
-                # Parse multipart data
-                parsed_data = parse_multipart_graphql_request(request)
-                
-                # Store uploaded files separately (they can't be JSON serialized)
-                request._uploaded_files = {}
-                
-                # Replace file objects with None in parsed_data for JSON serialization
-                def replace_files_with_none(obj, path=""):
-                    if isinstance(obj, dict):
-                        for key, value in list(obj.items()):
-                            current_path = f"{path}.{key}" if path else key
-                            if hasattr(value, 'read'):  # It's a file
-                                request._uploaded_files[current_path] = value
-                                obj[key] = None
-                            elif isinstance(value, (dict, list)):
-                                replace_files_with_none(value, current_path)
-                    elif isinstance(obj, list):
-                        for i, value in enumerate(obj):
-                            current_path = f"{path}[{i}]"
-                            if hasattr(value, 'read'):
-                                request._uploaded_files[current_path] = value
-                                obj[i] = None
-                            elif isinstance(value, (dict, list)):
-                                replace_files_with_none(value, current_path)
-                
-                replace_files_with_none(parsed_data)
-                
-                # Convert parsed data to JSON bytes
-                json_data = json.dumps(parsed_data).encode('utf-8')
-                
-                # Replace request body with JSON
-                from io import BytesIO
-                request._body = json_data
-                request._stream = BytesIO(json_data)
-                
-                # Force clear all content-type related caching
-                for attr in ['_content_type', 'content_type']:
-                    if hasattr(request, attr):
-                        try:
-                            delattr(request, attr)
-                        except:
-                            pass
-                
-                # Change content type to application/json so Strawberry accepts it
-                request.META['CONTENT_TYPE'] = 'application/json'
-                request.META['HTTP_CONTENT_TYPE'] = 'application/json'
-                
-                # Remove multipart boundary from content type
-                if 'HTTP_CONTENT_TYPE' in request.META and 'multipart' in request.META['HTTP_CONTENT_TYPE']:
-                    request.META['HTTP_CONTENT_TYPE'] = 'application/json'
+                use_large_chunk_upload_handlers(request)
                 
-                # Update content length
-                request.META['CONTENT_LENGTH'] = str(len(json_data))
-                
-                # Create a wrapper to force content_type property
-                original_content_type = type(request).content_type
-                type(request).content_type = property(lambda self: 'application/json')
-                
-                # Store original property to restore later
-                request._original_content_type_property = original_content_type
+                # Parse multipart data once; Strawberry picks it up in parse_multipart
+                # Uploaded files are also kept by path for resolvers reading the context
+                parsed_data, request._uploaded_files = parse_multipart_graphql_request(
+                    request.POST, request.FILES
+                )
+                request._graphql_operations = parsed_data
                 
             except Exception as e:
-                import traceback
                 traceback.print_exc()
                 return JsonResponse(
                     {"errors": [{"message": f"Invalid multipart request: {str(e)}"}]},
                     status=400
                 )
         
-        try:
-            response = super().dispatch(request, *args, **kwargs)
-            return response
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            raise
+        return super().dispatch(request, *args, **kwargs)
+    
+    def parse_multipart(self, request):
+        """Use the operations already parsed in dispatch instead of re-reading the form data"""
+        operations = getattr(request.request, '_graphql_operations', None)
+        if operations is None:
+            return super().parse_multipart(request)
+        return operations
     
     def get_context(self, request, response=None):
         """Override to inject uploaded files back into context"""
@@ -123,66 +166,27 @@ class CustomGraphQLView(GraphQLView):
         
         return context
     
-    def get_response(self, request, data, **kwargs):
-        response = super().get_response(request, data, **kwargs)
+    def execute_single(self, request, request_adapter, sub_response, context, root_value, request_data):
+        """Set the HTTP status code from the execution result's errors"""
+        result = super().execute_single(
+            request=request,
+            request_adapter=request_adapter,
+            sub_response=sub_response,
+            context=context,
+            root_value=root_value,
+            request_data=request_data,
+        )
         
-        # Parse response to check for errors
-        try:
-            response_data = json.loads(response.content)
-            
-            # Check if there are errors in the response
-            if 'errors' in response_data and response_data['errors']:
-                errors = response_data['errors']
-                
-                # Determine status code based on error type
-                status_code = 400  # Default to bad request
-                
-                for error in errors:
-                    error_message = error.get('message', '').lower()
-                    
-                    # Authentication errors
-                    if any(keyword in error_message for keyword in [
-                        'authentication', 'not authenticated', 'permission denied',
-                        'unauthorized', 'not authorized', 'token', 'invalid token'
-                    ]):
-                        status_code = 401
-                        break
-                    
-                    # Authorization/Permission errors
-                    elif any(keyword in error_message for keyword in [
-                        'forbidden', 'not allowed', 'access denied',
-                        'insufficient permissions', 'role'
-                    ]):
-                        status_code = 403
-                        break
-                    
-                    # Not found errors
-                    elif any(keyword in error_message for keyword in [
-                        'not found', 'does not exist', 'no matching'
-                    ]):
-                        status_code = 404
-                        break
-                    
-                    # Validation errors (keep as 400)
-                    elif any(keyword in error_message for keyword in [
-                        'invalid', 'required', 'validation', 'must be',
-                        'cannot', 'expected'
-                    ]):
-                        status_code = 400
-                        break
-                
-                response.status_code = status_code
-                
-        except (json.JSONDecodeError, AttributeError, KeyError):
-            # If we can't parse the response, leave it as is
-            pass
+        # For batched operations the first failing operation decides the status
+        if result.errors and sub_response.status_code is None:
+            sub_response.status_code = _get_error_status_code(result.errors)
         
-        return response
+        return result
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("graphql/", csrf_exempt(CustomGraphQLView.as_view(schema=schema))),
+    path("graphql/", csrf_exempt(CustomGraphQLView.as_view(schema=schema, multipart_uploads_enabled=True))),
     path('api/hod/', include('timetable.hod_urls')),
     path('api/', include('onboarding.urls')),
     path('api/profile/', include('profile_management.urls')),
@@ -2,13 +2,118 @@
 Admin interface for Assignment System
 """
 from django.contrib import admin
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save
+from django.template import Context, Template
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
+from django.db.models import (
+    BooleanField, Case, CharField, Count, Func, IntegerField, OuterRef, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Concat, Now
 from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade
+from profile_management.models import StudentProfile
 from assignment.utils import get_assignment_statistics
 
 
+STATISTICS_CACHE_TTL = 300  # 5 minutes
+
+# Badge HTML for the closed sets of statuses and grades, rendered once at import
+BADGE_HTML = '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>'
+GRADE_BADGE_HTML = '<span style="background-color: {}; color: white; padding: 5px 15px; border-radius: 3px; font-weight: bold;">{}</span>'
+
+ASSIGNMENT_STATUS_BADGES = {
+    status: format_html(BADGE_HTML, color, status)
+    for status, color in {
+        'DRAFT': 'gray',
+        'PUBLISHED': 'green',
+        'CLOSED': 'orange',
+        'GRADED': 'blue',
+    }.items()
+}
+
+SUBMISSION_STATUS_BADGES = {
+    status: format_html(BADGE_HTML, color, status)
+    for status, color in {
+        'SUBMITTED': 'blue',
+        'GRADED': 'green',
+        'RETURNED': 'orange',
+        'RESUBMITTED': 'purple',
+    }.items()
+}
+
+GRADE_LETTER_BADGES = {
+    grade: format_html(GRADE_BADGE_HTML, color, grade)
+    for grade, color in {
+        'A+': '#2ecc71',
+        'A': '#27ae60',
+        'B+': '#3498db',
+        'B': '#2980b9',
+        'C': '#f39c12',
+        'D': '#e67e22',
+        'F': '#e74c3c',
+    }.items()
+}
+
+LATE_BADGE = format_html(BADGE_HTML, 'red', 'LATE')
+ON_TIME_BADGE = format_html(BADGE_HTML, 'green', 'ON TIME')
+GRADED_MARK = format_html('<span style="color: {};">✓</span>', 'green')
+NOT_GRADED_MARK = format_html('<span style="color: {};">✗</span>', 'gray')
+
+# Compiled once at import; rendered per assignment in statistics_display
+STATISTICS_TEMPLATE = Template("""
+<table style="width: 100%; border-collapse: collapse;">
+    <tr style="background-color: #f0f0f0;">
+        <th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Metric</th>
+        <th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Value</th>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Total Students</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ total_students }}</td>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Submissions</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ total_submissions }} ({{ submission_percentage|floatformat:1 }}%)</td>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Not Submitted</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ not_submitted }}</td>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Graded</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ graded_count }}</td>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Pending Grading</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ pending_grading }}</td>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Late Submissions</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ late_submissions }}</td>
+    </tr>
+    <tr>
+        <td style="padding: 8px; border: 1px solid #ddd;">Average Marks</td>
+        <td style="padding: 8px; border: 1px solid #ddd;">{{ average_marks }} / {{ max_marks }} ({{ average_percentage|floatformat:1 }}%)</td>
+    </tr>
+</table>
+""")
+
+
+def defer_on_changelist(request, queryset, *fields):
+    """
+    Defer columns the changelist never renders
+    
+    Change forms still load every field, so they don't pay an extra query
+    per deferred column.
+    """
+    match = request.resolver_match
+    if match is not None and match.url_name and match.url_name.endswith('_changelist'):
+        return queryset.defer(*fields)
+    return queryset
+
+
 @admin.register(Assignment)
 class AssignmentAdmin(admin.ModelAdmin):
     """Admin interface for Assignment"""
@@ -26,12 +131,18 @@ class AssignmentAdmin(admin.ModelAdmin):
         'created_at',
     ]
     
+    list_select_related = ['subject', 'section', 'created_by']
+    
+    list_per_page = 50
+    list_max_show_all = 200
+    show_full_result_count = False
+    
     list_filter = [
         'status',
         'assignment_type',
-        'subject',
-        'section',
-        'semester',
+        ('subject', admin.RelatedOnlyFieldListFilter),
+        ('section', admin.RelatedOnlyFieldListFilter),
+        ('semester', admin.RelatedOnlyFieldListFilter),
         'created_at',
         'due_date',
     ]
@@ -58,6 +169,8 @@ class AssignmentAdmin(admin.ModelAdmin):
         'statistics_display',
     ]
     
+    autocomplete_fields = ['subject', 'section', 'semester', 'created_by']
+    
     fieldsets = (
         ('Basic Information', {
             'fields': (
@@ -131,37 +244,56 @@ class AssignmentAdmin(admin.ModelAdmin):
     
     def status_badge(self, obj):
         """Display status as colored badge"""
-        colors = {
-            'DRAFT': 'gray',
-            'PUBLISHED': 'green',
-            'CLOSED': 'orange',
-            'GRADED': 'blue',
-        }
-        color = colors.get(obj.status, 'black')
-        return format_html(
-            '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
-            color,
-            obj.status
-        )
+        badge = ASSIGNMENT_STATUS_BADGES.get(obj.status)
+        if badge is None:
+            badge = format_html(BADGE_HTML, 'black', obj.status)
+        return badge
     status_badge.short_description = 'Status'
     
     def due_date_display(self, obj):
         """Display due date with overdue indicator"""
-        if obj.is_overdue:
+        if obj._is_overdue:
             return format_html(
                 '<span style="color: red; font-weight: bold;">{} (OVERDUE)</span>',
-                obj.due_date.strftime('%Y-%m-%d %H:%M')
+                obj._due_date_str
             )
-        return obj.due_date.strftime('%Y-%m-%d %H:%M')
+        return obj._due_date_str
     due_date_display.short_description = 'Due Date'
     
+    def get_queryset(self, request):
+        """Annotate submission counts, section student counts and due date display values"""
+        section_student_count = StudentProfile.objects.filter(
+            section=OuterRef('section'),
+            is_active=True
+        ).order_by().values('section').annotate(count=Count('id')).values('count')
+        
+        queryset = super().get_queryset(request).annotate(
+            _total_submissions=Count('submissions'),
+            _section_student_count=Coalesce(
+                Subquery(section_student_count, output_field=IntegerField()), 0
+            ),
+            _is_overdue=Case(
+                When(due_date__lt=Now(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            _due_date_str=Func(
+                'due_date',
+                Value('YYYY-MM-DD HH24:MI'),
+                function='to_char',
+                output_field=CharField(),
+            ),
+        )
+        return defer_on_changelist(request, queryset, 'description', 'attachment')
+    
     def submission_stats(self, obj):
         """Display submission statistics"""
-        total = obj.total_submissions + obj.pending_submissions
-        percentage = (obj.total_submissions / total * 100) if total > 0 else 0.0
+        submitted = obj._total_submissions
+        total = obj._section_student_count
+        percentage = (submitted / total * 100) if total > 0 else 0.0
         return format_html(
             '{} / {} ({}%)',
-            obj.total_submissions,
+            submitted,
             total,
             f"{percentage:.1f}",
         )
@@ -172,59 +304,49 @@ class AssignmentAdmin(admin.ModelAdmin):
         if not obj.pk:
             return "Save assignment first to see statistics"
         
-        stats = get_assignment_statistics(obj)
-        
-        html = f"""
-        <table style="width: 100%; border-collapse: collapse;">
-            <tr style="background-color: #f0f0f0;">
-                <th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Metric</th>
-                <th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Value</th>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Total Students</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['total_students']}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Submissions</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['total_submissions']} ({stats['submission_percentage']:.1f}%)</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Not Submitted</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['not_submitted']}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Graded</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['graded_count']}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Pending Grading</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['pending_grading']}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Late Submissions</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['late_submissions']}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd;">Average Marks</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{stats['average_marks']} / {obj.max_marks} ({stats['average_percentage']:.1f}%)</td>
-            </tr>
-        </table>
-        """
+        # Statistics are cached per assignment version for a few minutes so
+        # repeated change form loads skip the aggregate queries
+        cache_key = (
+            f"assign_stats:{connection.schema_name}:{obj.pk}:"
+            f"{int(obj.updated_at.timestamp())}"
+        )
+        stats = cache.get_or_set(
+            cache_key,
+            lambda: get_assignment_statistics(obj),
+            STATISTICS_CACHE_TTL,
+        )
         
-        return format_html(html)
+        return STATISTICS_TEMPLATE.render(Context({**stats, 'max_marks': obj.max_marks}))
     statistics_display.short_description = 'Statistics'
     
     actions = ['publish_assignments', 'close_assignments']
     
     def publish_assignments(self, request, queryset):
         """Bulk publish assignments"""
-        count = 0
-        for assignment in queryset.filter(status='DRAFT'):
-            if assignment.due_date > timezone.now():
-                assignment.status = 'PUBLISHED'
-                assignment.published_date = timezone.now()
-                assignment.save()
-                count += 1
+        now = timezone.now()
+        assignments = list(
+            queryset.filter(status='DRAFT', due_date__gt=now).select_related('section', 'created_by')
+        )
+        count = Assignment.objects.filter(pk__in=[assignment.pk for assignment in assignments]).update(
+            status='PUBLISHED',
+            published_date=now,
+            updated_at=now,
+        )
+        
+        # update() doesn't send post_save, which triggers the publish notifications
+        update_fields = frozenset({'status', 'published_date', 'updated_at'})
+        for assignment in assignments:
+            assignment.status = 'PUBLISHED'
+            assignment.published_date = now
+            assignment.updated_at = now
+            post_save.send(
+                sender=Assignment,
+                instance=assignment,
+                created=False,
+                update_fields=update_fields,
+                raw=False,
+                using=queryset.db,
+            )
         
         self.message_user(request, f'{count} assignment(s) published successfully.')
     publish_assignments.short_description = 'Publish selected assignments'
@@ -251,19 +373,25 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
         'marks_display',
     ]
     
+    list_select_related = ['assignment', 'grade']
+    
+    list_per_page = 50
+    list_max_show_all = 200
+    show_full_result_count = False
+    
     list_filter = [
         'status',
         'is_late',
         'submitted_at',
-        'assignment__subject',
-        'assignment__section',
+        ('assignment__subject', admin.RelatedOnlyFieldListFilter),
+        ('assignment__section', admin.RelatedOnlyFieldListFilter),
     ]
     
     search_fields = [
         'assignment__title',
         'student__user__email',
-        'student__user__first_name',
-        'student__user__last_name',
+        'student__first_name',
+        'student__last_name',
         'student__register_number',
         'submission_text',
     ]
@@ -275,6 +403,8 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
         'is_late',
     ]
     
+    autocomplete_fields = ['assignment', 'student', 'graded_by']
+    
     fieldsets = (
         ('Basic Information', {
             'fields': (
@@ -313,41 +443,25 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
     
     def student_display(self, obj):
         """Display student name"""
-        return f"{obj.student.user.first_name} {obj.student.user.last_name} ({obj.student.register_number})"
+        return obj._student_label
     student_display.short_description = 'Student'
     
     def status_badge(self, obj):
         """Display status as colored badge"""
-        colors = {
-            'SUBMITTED': 'blue',
-            'GRADED': 'green',
-            'RETURNED': 'orange',
-            'RESUBMITTED': 'purple',
-        }
-        color = colors.get(obj.status, 'gray')
-        return format_html(
-            '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
-            color,
-            obj.status
-        )
+        badge = SUBMISSION_STATUS_BADGES.get(obj.status)
+        if badge is None:
+            badge = format_html(BADGE_HTML, 'gray', obj.status)
+        return badge
     status_badge.short_description = 'Status'
     
     def is_late_badge(self, obj):
         """Display late submission badge"""
-        if obj.is_late:
-            return format_html(
-                '<span style="background-color: red; color: white; padding: 3px 10px; border-radius: 3px;">LATE</span>'
-            )
-        return format_html(
-            '<span style="background-color: green; color: white; padding: 3px 10px; border-radius: 3px;">ON TIME</span>'
-        )
+        return LATE_BADGE if obj.is_late else ON_TIME_BADGE
     is_late_badge.short_description = 'Timeliness'
     
     def graded_display(self, obj):
         """Display if graded"""
-        if obj.status == 'GRADED':
-            return format_html('<span style="color: {};">✓</span>', 'green')
-        return format_html('<span style="color: {};">✗</span>', 'gray')
+        return GRADED_MARK if obj.status == 'GRADED' else NOT_GRADED_MARK
     graded_display.short_description = 'Graded'
     
     def marks_display(self, obj):
@@ -356,6 +470,17 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
             return f"{obj.grade.marks_obtained} / {obj.assignment.max_marks} ({obj.grade.grade_letter})"
         return "-"
     marks_display.short_description = 'Marks'
+    
+    def get_queryset(self, request):
+        """Build the student label in SQL and skip the submission text and file columns on the changelist"""
+        queryset = super().get_queryset(request).annotate(
+            _student_label=Concat(
+                'student__first_name', Value(' '), 'student__last_name',
+                Value(' ('), 'student__register_number', Value(')'),
+                output_field=CharField(),
+            )
+        )
+        return defer_on_changelist(request, queryset, 'submission_text', 'attachment')
 
 
 @admin.register(AssignmentGrade)
@@ -373,17 +498,27 @@ class AssignmentGradeAdmin(admin.ModelAdmin):
         'graded_at',
     ]
     
+    list_select_related = [
+        'submission',
+        'submission__assignment',
+        'graded_by',
+    ]
+    
+    list_per_page = 50
+    list_max_show_all = 200
+    show_full_result_count = False
+    
     list_filter = [
         'graded_at',
-        'submission__assignment__subject',
-        'submission__assignment__section',
+        ('submission__assignment__subject', admin.RelatedOnlyFieldListFilter),
+        ('submission__assignment__section', admin.RelatedOnlyFieldListFilter),
     ]
     
     search_fields = [
         'submission__assignment__title',
         'submission__student__user__email',
-        'submission__student__user__first_name',
-        'submission__student__user__last_name',
+        'submission__student__first_name',
+        'submission__student__last_name',
         'feedback',
     ]
     
@@ -394,6 +529,9 @@ class AssignmentGradeAdmin(admin.ModelAdmin):
         'grade_letter',
     ]
     
+    autocomplete_fields = ['graded_by']
+    raw_id_fields = ['submission']
+    
     fieldsets = (
         ('Basic Information', {
             'fields': (
@@ -426,7 +564,7 @@ class AssignmentGradeAdmin(admin.ModelAdmin):
     
     def student_display(self, obj):
         """Display student name"""
-        return f"{obj.submission.student.user.first_name} {obj.submission.student.user.last_name}"
+        return obj._student_name
     student_display.short_description = 'Student'
     
     def marks_display(self, obj):
@@ -441,24 +579,20 @@ class AssignmentGradeAdmin(admin.ModelAdmin):
     
     def grade_letter_badge(self, obj):
         """Display grade letter as badge"""
-        colors = {
-            'A+': '#2ecc71',
-            'A': '#27ae60',
-            'B+': '#3498db',
-            'B': '#2980b9',
-            'C': '#f39c12',
-            'D': '#e67e22',
-            'F': '#e74c3c',
-        }
-        color = colors.get(obj.grade_letter, 'gray')
-        return format_html(
-            '<span style="background-color: {}; color: white; padding: 5px 15px; border-radius: 3px; font-weight: bold;">{}</span>',
-            color,
-            obj.grade_letter
-        )
+        return GRADE_LETTER_BADGES[obj.grade_letter]
     grade_letter_badge.short_description = 'Grade'
     
     def graded_by_display(self, obj):
         """Display grader name"""
         return obj.graded_by.email or obj.graded_by.register_number
     graded_by_display.short_description = 'Graded By'
+    
+    def get_queryset(self, request):
+        """Build the student name in SQL and skip the feedback and rubric columns on the changelist"""
+        queryset = super().get_queryset(request).annotate(
+            _student_name=Concat(
+                'submission__student__first_name', Value(' '), 'submission__student__last_name',
+                output_field=CharField(),
+            )
+        )
+        return defer_on_changelist(request, queryset, 'feedback', 'grading_rubric')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssignmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assignment'
+
+    def ready(self):
+        """Import signal receivers when app is ready."""
+        import assignment.receivers  # noqa: F401
@@ -0,0 +1,54 @@
+"""
+Cached lookups shared by the Assignment admin, GraphQL API and utilities
+"""
+from django.core.cache import cache
+from django.db import connection
+
+
+# Section sizes change rarely; the short TTL also covers students moved by
+# queryset.update(), which doesn't send the signals that invalidate the cache
+SECTION_STUDENT_COUNT_TTL = 60  # seconds
+
+
+def _section_student_count_key(section_id):
+    return f"section_students:{connection.schema_name}:{section_id}"
+
+
+def get_active_student_count(section_id, context=None):
+    """
+    Get the number of active students in a section
+    
+    Counts are cached per tenant for a short time and, when a GraphQL context
+    is given, memoized on it for the rest of the request.
+    
+    Args:
+        section_id: Section ID
+        context: Optional GraphQL context for per-request memoization
+    
+    Returns:
+        int: Number of active students in the section
+    """
+    counts = None
+    if context is not None:
+        counts = getattr(context, '_section_student_counts', None)
+        if counts is None:
+            counts = context._section_student_counts = {}
+        if section_id in counts:
+            return counts[section_id]
+    
+    from profile_management.models import StudentProfile
+    
+    count = cache.get_or_set(
+        _section_student_count_key(section_id),
+        lambda: StudentProfile.objects.filter(section_id=section_id, is_active=True).count(),
+        SECTION_STUDENT_COUNT_TTL,
+    )
+    
+    if counts is not None:
+        counts[section_id] = count
+    return count
+
+
+def invalidate_active_student_count(section_id):
+    """Drop the cached active student count of a section"""
+    cache.delete(_section_student_count_key(section_id))
@@ -0,0 +1,189 @@
+"""
+Request-scoped lookups for the Assignment GraphQL API
+
+Objects are cached on the GraphQL context, so resolvers and mutations that
+run in the same request share one query per object.
+"""
+from graphql import FieldNode, value_from_ast_untyped
+from django.utils import timezone
+from strawberry.types import Info
+
+from assignment.models import Assignment
+from timetable.models import TimetableEntry
+
+
+# Relations read by the resolvers, validators and returned GraphQL types
+ASSIGNMENT_RELATED_FIELDS = ('created_by', 'subject', 'section', 'semester')
+SUBMISSION_RELATED_FIELDS = (
+    'assignment',
+    'assignment__created_by',
+    'assignment__subject',
+    'assignment__section',
+    'student__user',
+)
+
+
+def _get_assignment_cache(info: Info) -> dict:
+    context = info.context
+    assignments = getattr(context, '_assignments', None)
+    if assignments is None:
+        assignments = context._assignments = {}
+    return assignments
+
+
+def get_sibling_field_ids(info: Info) -> list:
+    """
+    Get the `id` arguments of every top-level field in the operation with this field's name
+
+    Lets a root resolver such as `assignment(id: ...)` load all of its aliased
+    siblings at once. Fields inside fragments are not collected.
+
+    Args:
+        info: Strawberry Info object
+
+    Returns:
+        list: IDs requested by the sibling fields (empty for nested fields)
+    """
+    if info.path.prev is not None:
+        return []
+
+    ids = []
+    for selection in info.operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value != info.field_name:
+            continue
+        for argument in selection.arguments:
+            if argument.name.value == 'id':
+                value = value_from_ast_untyped(argument.value, info.variable_values)
+                if isinstance(value, (int, str)) and str(value).isdigit():
+                    ids.append(int(value))
+    return ids
+
+
+def prime_assignments(info: Info, assignment_ids) -> None:
+    """
+    Load several assignments into the request cache with one query
+
+    Args:
+        info: Strawberry Info object
+        assignment_ids: Assignment IDs
+    """
+    assignments = _get_assignment_cache(info)
+    missing_ids = [assignment_id for assignment_id in assignment_ids if assignment_id not in assignments]
+    if not missing_ids:
+        return
+
+    found = Assignment.objects.select_related(*ASSIGNMENT_RELATED_FIELDS).in_bulk(missing_ids)
+    for assignment_id in missing_ids:
+        assignments[assignment_id] = found.get(assignment_id)
+
+
+def prime_sibling_assignments(info: Info) -> None:
+    """
+    Load the assignments of every aliased sibling of this field with one query
+
+    Only the first sibling resolver of an operation walks it and queries; the
+    rest find it already primed. The context is shared by batched operations,
+    so the operation and its variables identify the entry.
+
+    Args:
+        info: Strawberry Info object
+    """
+    context = info.context
+    primed = getattr(context, '_primed_sibling_fields', None)
+    if primed is None:
+        primed = context._primed_sibling_fields = {}
+
+    operation, variable_values = info.operation, info.variable_values
+    entry = primed.get(info.field_name)
+    if entry is not None and entry[0] is operation and entry[1] is variable_values:
+        return
+    primed[info.field_name] = (operation, variable_values)
+
+    prime_assignments(info, get_sibling_field_ids(info))
+
+
+def get_assignment(info: Info, assignment_id: int) -> Assignment:
+    """
+    Get an assignment by ID, cached on the context for the request
+
+    Args:
+        info: Strawberry Info object
+        assignment_id: Assignment ID
+
+    Returns:
+        Assignment: Assignment with its common relations loaded
+
+    Raises:
+        Assignment.DoesNotExist: If there is no assignment with this ID
+    """
+    assignments = _get_assignment_cache(info)
+
+    if assignment_id not in assignments:
+        assignments[assignment_id] = Assignment.objects.select_related(
+            *ASSIGNMENT_RELATED_FIELDS
+        ).filter(id=assignment_id).first()
+
+    assignment = assignments[assignment_id]
+    if assignment is None:
+        raise Assignment.DoesNotExist("Assignment matching query does not exist.")
+    return assignment
+
+
+def forget_assignment(info: Info, assignment_id: int) -> None:
+    """Drop an assignment from the request cache (e.g. after deleting it)"""
+    assignments = getattr(info.context, '_assignments', None)
+    if assignments is not None:
+        assignments.pop(assignment_id, None)
+
+
+def forget_submission_counts(info: Info, assignment_id: int) -> None:
+    """Drop the submission counts cached on a request-cached assignment after its submissions change"""
+    assignments = getattr(info.context, '_assignments', None)
+    assignment = assignments.get(assignment_id) if assignments else None
+    if assignment is not None:
+        assignment.__dict__.pop('_submission_counts', None)
+
+
+def user_teaches(info: Info, subject_id: int, section_id: int) -> bool:
+    """
+    Check if the request user actively teaches a subject to a section, cached for the request
+
+    Args:
+        info: Strawberry Info object
+        subject_id: Subject ID
+        section_id: Section ID
+
+    Returns:
+        bool: True if the user has an active timetable entry for the pair
+    """
+    context = info.context
+    teaches = getattr(context, '_teaches', None)
+    if teaches is None:
+        teaches = context._teaches = {}
+
+    key = (subject_id, section_id)
+    if key not in teaches:
+        teaches[key] = TimetableEntry.objects.filter(
+            subject_id=subject_id,
+            section_id=section_id,
+            faculty=context.request.user,
+            is_active=True
+        ).exists()
+    return teaches[key]
+
+
+def get_request_now(info: Info):
+    """
+    Get the current time once per request, so every row is checked against the same time
+
+    Args:
+        info: Strawberry Info object
+
+    Returns:
+        datetime: Aware datetime of the first call in this request
+    """
+    context = info.context
+    now = getattr(context, '_now', None)
+    if now is None:
+        now = context._now = timezone.now()
+    return now
@@ -3,15 +3,46 @@ GraphQL Mutations for Assignment System
 """
 import strawberry
 from strawberry.types import Info
-from typing import Optional
+from typing import List, Optional
 from django.utils import timezone
-from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_save
+from django.core.files import File
 import json
-import base64
+import binascii
 import os
+import re
+import string
+import tempfile
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+try:
+    # SIMD-accelerated decoder with the same API and errors as the stdlib
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade
-from assignment.validators import AssignmentValidator
+from core.models import Section
+from profile_management.models import Semester, StudentProfile
+from timetable.models import Subject, TimetableEntry
+from assignment.validators import ADMIN_ROLES, FACULTY_ROLES, AssignmentValidator
+from core.graphql.auth import get_role_code, get_student_profile
+from assignment.graphql.loaders import (
+    SUBMISSION_RELATED_FIELDS,
+    forget_assignment,
+    forget_submission_counts,
+    get_assignment,
+    user_teaches,
+)
 from assignment.graphql.types import (
     AssignmentType,
     AssignmentSubmissionType,
@@ -22,10 +53,110 @@ from assignment.graphql.types import (
     GradeAssignmentInput,
     ReturnSubmissionInput,
     SubmitAssignmentResponse,
-    GradeAssignmentResponse
+    GradeAssignmentResponse,
+    BulkGradeAssignmentResponse
 )
 
 
+ALLOWED_ATTACHMENT_EXTENSIONS = frozenset({
+    '.pdf', '.doc', '.docx', '.txt', '.zip', '.ppt', '.pptx', '.xls', '.xlsx',
+})
+ALLOWED_ATTACHMENT_EXTENSIONS_DISPLAY = ', '.join(sorted(ALLOWED_ATTACHMENT_EXTENSIONS))
+
+MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Decode in slices that are a multiple of 4 base64 characters (3 bytes),
+# spooling to disk once an attachment passes 1MB
+BASE64_DECODE_CHUNK_SIZE = 256 * 1024
+ATTACHMENT_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+# Characters allowed in (whitespace-free) standard base64 data
+BASE64_ALPHABET = (string.ascii_letters + string.digits + '+/=').encode('ascii')
+
+# Matches only the short "data:<mime>;base64," header, never the payload
+DATA_URI_PREFIX_RE = re.compile(r'data:[^;,]*(?:;[^,]*)?,')
+
+
+def _strip_data_uri_prefix(data):
+    """Return the base64 payload of a data URI, or the string itself if it has no prefix"""
+    match = DATA_URI_PREFIX_RE.match(data)
+    return data[match.end():] if match else data
+
+
+def _base64_decoded_size(b64_data):
+    """Size in bytes of the data a base64 string decodes to, without decoding it"""
+    return len(b64_data) * 3 // 4 - b64_data[-2:].count('=')
+
+
+def _decode_base64_file(b64_data, filename):
+    """Decode base64 data chunk by chunk into a File that spills to disk when large"""
+    if any(char in b64_data for char in ' \r\n\t'):
+        # Line breaks would misalign the chunks, drop them first
+        b64_data = ''.join(b64_data.split())
+    
+    # b64decode silently drops unknown characters, reject them up front instead
+    try:
+        b64_bytes = b64_data.encode('ascii')
+    except UnicodeEncodeError:
+        raise binascii.Error("Non-base64 character in data")
+    if b64_bytes.translate(None, BASE64_ALPHABET):
+        raise binascii.Error("Non-base64 character in data")
+    # Padding may only end the data, which must be whole 4-character groups;
+    # b64decode would otherwise stop at (or skip over) '=' mid-data
+    unpadded = b64_bytes.rstrip(b'=')
+    if len(b64_bytes) % 4 or len(b64_bytes) - len(unpadded) > 2 or b'=' in unpadded:
+        raise binascii.Error("Invalid base64 padding")
+    
+    spooled_file = tempfile.SpooledTemporaryFile(max_size=ATTACHMENT_SPOOL_MAX_SIZE)
+    for start in range(0, len(b64_bytes), BASE64_DECODE_CHUNK_SIZE):
+        spooled_file.write(base64.b64decode(b64_bytes[start:start + BASE64_DECODE_CHUNK_SIZE]))
+    spooled_file.seek(0)
+    return File(spooled_file, name=filename)
+
+
+def _get_uploaded_attachment(input):
+    """
+    Get the multipart `attachment` upload of a create/update input as a File, or None
+    
+    The upload is validated (type and size) but never read into memory; saving
+    the model streams it to storage in chunks.
+    """
+    # The multipart parser places each operation's file at its own variable path
+    upload = input.attachment
+    if upload is None:
+        return None
+    
+    filename = input.attachment_filename or upload.name
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ALLOWED_ATTACHMENT_EXTENSIONS:
+        raise Exception(f"File type '{ext}' not allowed. Allowed types: {ALLOWED_ATTACHMENT_EXTENSIONS_DISPLAY}")
+    if upload.size > MAX_ATTACHMENT_SIZE:
+        raise Exception(f"File too large. Maximum size is 10MB (received {upload.size / 1024 / 1024:.2f}MB)")
+    
+    return File(upload, name=filename)
+
+
+def _parse_grading_rubric(grading_rubric):
+    """Parse a JSON rubric string, raising ValueError for malformed input"""
+    if not grading_rubric:
+        return None
+    try:
+        return _loads(grading_rubric)
+    except _JSONDecodeError:
+        raise ValueError("Invalid grading rubric JSON")
+
+
+def _submit_failure(message):
+    """Build a failed submit response"""
+    return SubmitAssignmentResponse(success=False, message=message, submission=None)
+
+
+def _grade_failure(message):
+    """Build a failed grade response"""
+    return GradeAssignmentResponse(success=False, message=message, grade=None)
+
+
 @strawberry.type
 class AssignmentMutation:
     """Assignment-related mutations"""
@@ -42,60 +173,57 @@ class AssignmentMutation:
         user = info.context.request.user
         
         # Check if user is faculty
-        if user.role.code not in ['FACULTY', 'ADMIN', 'HOD']:
+        if get_role_code(info) not in FACULTY_ROLES:
             raise Exception("Only faculty can create assignments")
         
-        # Get related objects
-        from timetable.models import Subject
-        from core.models import Section
-        from profile_management.models import Semester
+        # Check all related objects exist in a single query
+        references = Semester.objects.filter(id=input.semester_id).annotate(
+            subject_exists=Exists(Subject.objects.filter(id=input.subject_id)),
+            section_exists=Exists(Section.objects.filter(id=input.section_id)),
+        ).values_list('subject_exists', 'section_exists').first()
         
-        try:
-            subject = Subject.objects.get(id=input.subject_id)
-            section = Section.objects.get(id=input.section_id)
-            semester = Semester.objects.get(id=input.semester_id)
-        except Exception as e:
-            raise Exception(f"Invalid reference: {str(e)}")
+        if references is None:
+            raise Exception("Invalid reference: Semester matching query does not exist.")
+        subject_exists, section_exists = references
+        if not subject_exists:
+            raise Exception("Invalid reference: Subject matching query does not exist.")
+        if not section_exists:
+            raise Exception("Invalid reference: Section matching query does not exist.")
         
         # Validate
         is_valid, error_message = AssignmentValidator.validate_assignment_creation(
-            subject,
-            section,
+            input.subject_id,
+            input.section_id,
             input.due_date,
-            user
+            user,
+            teaches=user_teaches(info, input.subject_id, input.section_id)
         )
         
         if not is_valid:
             raise Exception(error_message)
         
-        # Handle base64 file upload
-        attachment_file = None
-        if input.attachment_data and input.attachment_filename:
+        # Handle multipart file upload, falling back to base64
+        attachment_file = _get_uploaded_attachment(input)
+        if attachment_file is None and input.attachment_data and input.attachment_filename:
             try:
-                # Decode base64 data
-                # Handle both with and without data URI prefix
-                if ',' in input.attachment_data:
-                    # Format: "data:application/pdf;base64,JVBERi0..."
-                    file_data = base64.b64decode(input.attachment_data.split(',')[-1])
-                else:
-                    # Raw base64 string
-                    file_data = base64.b64decode(input.attachment_data)
+                # Validate file type before doing any decode work
+                ext = os.path.splitext(input.attachment_filename)[1].lower()
+                if ext not in ALLOWED_ATTACHMENT_EXTENSIONS:
+                    raise Exception(f"File type '{ext}' not allowed. Allowed types: {ALLOWED_ATTACHMENT_EXTENSIONS_DISPLAY}")
                 
-                # Validate file size (10MB max)
-                max_size = 10 * 1024 * 1024  # 10MB
-                if len(file_data) > max_size:
-                    raise Exception(f"File too large. Maximum size is 10MB (received {len(file_data) / 1024 / 1024:.2f}MB)")
+                # Handle both with and without data URI prefix
+                # Format: "data:application/pdf;base64,JVBERi0..." or a raw base64 string
+                b64_data = _strip_data_uri_prefix(input.attachment_data)
                 
-                # Validate file type
-                allowed_extensions = ['.pdf', '.doc', '.docx', '.txt', '.zip', '.ppt', '.pptx', '.xls', '.xlsx']
-                ext = os.path.splitext(input.attachment_filename)[1].lower()
-                if ext not in allowed_extensions:
-                    raise Exception(f"File type '{ext}' not allowed. Allowed types: {', '.join(allowed_extensions)}")
+                # Validate file size (10MB max) from the encoded length, before decoding
+                decoded_size = _base64_decoded_size(b64_data)
+                if decoded_size > MAX_ATTACHMENT_SIZE:
+                    raise Exception(f"File too large. Maximum size is 10MB (received {decoded_size / 1024 / 1024:.2f}MB)")
                 
-                # Create ContentFile
-                attachment_file = ContentFile(file_data, name=input.attachment_filename)
+                # Decode base64 data
+                attachment_file = _decode_base64_file(b64_data, input.attachment_filename)
                 
-            except base64.binascii.Error as e:
+            except binascii.Error as e:
                 raise Exception(f"Invalid base64 data: {str(e)}")
             except Exception as e:
                 if "File too large" in str(e) or "File type" in str(e):
@@ -113,20 +241,21 @@ class AssignmentMutation:
         
         # Create assignment
         assignment = Assignment.objects.create(
-            subject=subject,
-            section=section,
-            semester=semester,
+            subject_id=input.subject_id,
+            section_id=input.section_id,
+            semester_id=input.semester_id,
             created_by=user,
             title=input.title,
             description=input.description,
-            assignment_type=input.assignment_type,
+            assignment_type=input.assignment_type.value,
             due_date=due_date,
             max_marks=input.max_marks,
             weightage=input.weightage,
             allow_late_submission=input.allow_late_submission,
             late_submission_deadline=late_submission_deadline,
             status='DRAFT',
-            attachment=attachment_file
+            attachment=attachment_file,
+            attachment_original_name=os.path.basename(attachment_file.name) if attachment_file else ''
         )
         
         return assignment
@@ -144,47 +273,52 @@ class AssignmentMutation:
         
         # Get assignment
         try:
-            assignment = Assignment.objects.get(id=input.assignment_id)
+            assignment = get_assignment(info, input.assignment_id)
         except Assignment.DoesNotExist:
             raise Exception("Assignment not found")
         
         # Check if user is the creator
         if assignment.created_by.id != user.id:
-            if user.role.code not in ['ADMIN', 'HOD']:
+            if get_role_code(info) not in ADMIN_ROLES:
                 raise Exception("Only the creator can update this assignment")
         
-        # Handle base64 file upload
-        if input.attachment_data and input.attachment_filename:
+        # Handle multipart file upload, falling back to base64
+        attachment_file = _get_uploaded_attachment(input)
+        if attachment_file is not None:
+            if assignment.attachment:
+                assignment.attachment.delete(save=False)
+            assignment.attachment = attachment_file
+        elif input.attachment_data and input.attachment_filename:
             try:
-                # Decode base64 data
-                if ',' in input.attachment_data:
-                    file_data = base64.b64decode(input.attachment_data.split(',')[-1])
-                else:
-                    file_data = base64.b64decode(input.attachment_data)
+                # Validate file type before doing any decode work
+                ext = os.path.splitext(input.attachment_filename)[1].lower()
+                if ext not in ALLOWED_ATTACHMENT_EXTENSIONS:
+                    raise Exception(f"File type not allowed. Allowed: {ALLOWED_ATTACHMENT_EXTENSIONS_DISPLAY}")
+                
+                b64_data = _strip_data_uri_prefix(input.attachment_data)
                 
-                # Validate file size (10MB max)
-                max_size = 10 * 1024 * 1024
-                if len(file_data) > max_size:
+                # Validate file size (10MB max) from the encoded length, before decoding
+                if _base64_decoded_size(b64_data) > MAX_ATTACHMENT_SIZE:
                     raise Exception(f"File too large. Maximum size is 10MB")
                 
-                # Validate file type
-                allowed_extensions = ['.pdf', '.doc', '.docx', '.txt', '.zip', '.ppt', '.pptx', '.xls', '.xlsx']
-                ext = os.path.splitext(input.attachment_filename)[1].lower()
-                if ext not in allowed_extensions:
-                    raise Exception(f"File type not allowed. Allowed: {', '.join(allowed_extensions)}")
+                # Decode base64 data
+                attachment_file = _decode_base64_file(b64_data, input.attachment_filename)
                 
                 # Delete old attachment if exists
                 if assignment.attachment:
                     assignment.attachment.delete(save=False)
                 
                 # Set new attachment
-                assignment.attachment = ContentFile(file_data, name=input.attachment_filename)
+                assignment.attachment = attachment_file
                 
             except Exception as e:
                 if "File too large" in str(e) or "File type" in str(e):
                     raise
                 raise Exception(f"File upload error: {str(e)}")
         
+        if attachment_file is not None:
+            assignment.attachment_original_name = os.path.basename(attachment_file.name)
+        
         # Check if assignment is published (restrict updates)
         if assignment.status != 'DRAFT':
             # Only allow certain updates for published assignments
@@ -231,7 +365,7 @@ class AssignmentMutation:
         
         # Get assignment
         try:
-            assignment = Assignment.objects.get(id=assignment_id)
+            assignment = get_assignment(info, assignment_id)
         except Assignment.DoesNotExist:
             raise Exception("Assignment not found")
         
@@ -247,7 +381,7 @@ class AssignmentMutation:
         # Publish
         assignment.status = 'PUBLISHED'
         assignment.published_date = timezone.now()
-        assignment.save()
+        assignment.save(update_fields=['status', 'published_date', 'updated_at'])
         
         return assignment
     
@@ -264,18 +398,22 @@ class AssignmentMutation:
         
         # Get assignment
         try:
-            assignment = Assignment.objects.get(id=assignment_id)
+            assignment = get_assignment(info, assignment_id)
         except Assignment.DoesNotExist:
             raise Exception("Assignment not found")
         
         # Check if user is the creator
         if assignment.created_by.id != user.id:
-            if user.role.code not in ['ADMIN', 'HOD']:
+            if get_role_code(info) not in ADMIN_ROLES:
                 raise Exception("Only the creator can close this assignment")
         
-        # Close
+        # Close with a direct UPDATE (post_save only acts on publishing)
         assignment.status = 'CLOSED'
-        assignment.save()
+        assignment.updated_at = timezone.now()
+        Assignment.objects.filter(pk=assignment.pk).update(
+            status=assignment.status,
+            updated_at=assignment.updated_at
+        )
         
         return assignment
     
@@ -292,7 +430,7 @@ class AssignmentMutation:
         
         # Get assignment
         try:
-            assignment = Assignment.objects.get(id=assignment_id)
+            assignment = get_assignment(info, assignment_id)
         except Assignment.DoesNotExist:
             raise Exception("Assignment not found")
         
@@ -307,6 +445,7 @@ class AssignmentMutation:
         
         # Delete
         assignment.delete()
+        forget_assignment(info, assignment_id)
         return True
     
     @strawberry.mutation
@@ -318,62 +457,72 @@ class AssignmentMutation:
         """
         Student submits an assignment
         """
-        user = info.context.request.user
-        
         # Check if user is student
-        if user.role.code != 'STUDENT':
+        if get_role_code(info) != 'STUDENT':
             raise Exception("Only students can submit assignments")
         
         # Get student profile
         try:
-            from profile_management.models import StudentProfile
-            student_profile = StudentProfile.objects.get(user=user)
+            student_profile = get_student_profile(info)
         except StudentProfile.DoesNotExist:
             raise Exception("Student profile not found")
         
         # Get assignment
         try:
-            assignment = Assignment.objects.get(id=input.assignment_id)
+            assignment = get_assignment(info, input.assignment_id)
         except Assignment.DoesNotExist:
             raise Exception("Assignment not found")
         
-        # Validate
-        is_valid, error_message = AssignmentValidator.validate_submission(
-            assignment,
-            student_profile
-        )
-        
-        if not is_valid:
-            return SubmitAssignmentResponse(
-                success=False,
-                message=error_message,
-                submission=None
-            )
-        
-        # Check if this is a resubmission
-        existing_submission = AssignmentSubmission.objects.filter(
-            assignment=assignment,
-            student=student_profile
-        ).first()
-        
-        if existing_submission and existing_submission.status == 'RETURNED':
-            # Resubmission
-            existing_submission.submission_text = input.submission_text
-            existing_submission.status = 'RESUBMITTED'
-            existing_submission.save()
+        with transaction.atomic():
+            # Lock any existing submission so concurrent resubmissions serialize
+            existing_submission = AssignmentSubmission.objects.select_for_update().filter(
+                assignment=assignment,
+                student=student_profile
+            ).first()
             
-            return SubmitAssignmentResponse(
-                success=True,
-                message="Assignment resubmitted successfully",
-                submission=existing_submission
+            # Validate
+            is_valid, error_message = AssignmentValidator.validate_submission(
+                assignment,
+                student_profile,
+                existing_submission=existing_submission
             )
-        
-        # Create new submission
-        submission = AssignmentSubmission.objects.create(
-            assignment=assignment,
-            student=student_profile,
-            submission_text=input.submission_text or ""
-        )
+            
+            if not is_valid:
+                return _submit_failure(error_message)
+            
+            if existing_submission:
+                # Resubmission of a returned submission; post_save only acts on
+                # new submissions, so a plain UPDATE of the changed columns is enough
+                existing_submission.assignment = assignment
+                existing_submission.submission_text = input.submission_text or ""
+                existing_submission.status = 'RESUBMITTED'
+                existing_submission.updated_at = timezone.now()
+                AssignmentSubmission.objects.filter(pk=existing_submission.pk).update(
+                    submission_text=existing_submission.submission_text,
+                    status=existing_submission.status,
+                    updated_at=existing_submission.updated_at
+                )
+                
+                return SubmitAssignmentResponse(
+                    success=True,
+                    message="Assignment resubmitted successfully",
+                    submission=existing_submission
+                )
+            
+            # Create new submission; the unique (assignment, student) constraint
+            # catches a concurrent first submission that the lock can't see
+            try:
+                with transaction.atomic():
+                    submission = AssignmentSubmission.objects.create(
+                        assignment=assignment,
+                        student=student_profile,
+                        submission_text=input.submission_text or ""
+                    )
+            except IntegrityError:
+                return _submit_failure("You have already submitted this assignment")
+        
+        # Later operations in a batched request must recount the submissions
+        forget_submission_counts(info, assignment.id)
         
         return SubmitAssignmentResponse(
             success=True,
@@ -393,62 +542,62 @@ class AssignmentMutation:
         user = info.context.request.user
         
         # Check if user is faculty
-        if user.role.code not in ['FACULTY', 'ADMIN', 'HOD']:
+        if get_role_code(info) not in FACULTY_ROLES:
             raise Exception("Only faculty can grade assignments")
         
         # Get submission
         try:
-            submission = AssignmentSubmission.objects.get(id=input.submission_id)
+            submission = AssignmentSubmission.objects.select_related(
+                *SUBMISSION_RELATED_FIELDS
+            ).get(id=input.submission_id)
         except AssignmentSubmission.DoesNotExist:
             raise Exception("Submission not found")
         
-        # Validate
+        # Validate (the teaching check is only needed when grading someone else's assignment)
+        assignment = submission.assignment
+        teaches = None
+        if assignment.created_by_id != user.id:
+            teaches = user_teaches(info, assignment.subject_id, assignment.section_id)
+        
         is_valid, error_message = AssignmentValidator.validate_grading(
             submission,
             user,
-            input.marks_obtained
+            input.marks_obtained,
+            teaches=teaches
         )
         
         if not is_valid:
-            return GradeAssignmentResponse(
-                success=False,
-                message=error_message,
-                grade=None
-            )
+            return _grade_failure(error_message)
         
-        # Parse rubric if provided
-        grading_rubric = None
-        if input.grading_rubric:
-            try:
-                grading_rubric = json.loads(input.grading_rubric)
-            except:
-                pass
-        
-        # Check if grade already exists
-        grade = None
         try:
-            grade = AssignmentGrade.objects.get(submission=submission)
-            # Update existing grade
-            grade.marks_obtained = input.marks_obtained
-            grade.feedback = input.feedback or ""
-            grade.grading_rubric = grading_rubric
-            grade.graded_by = user
-            grade.save()
-        except AssignmentGrade.DoesNotExist:
-            # Create new grade
-            grade = AssignmentGrade.objects.create(
-                submission=submission,
-                marks_obtained=input.marks_obtained,
-                feedback=input.feedback or "",
-                grading_rubric=grading_rubric,
-                graded_by=user
-            )
+            grading_rubric = _parse_grading_rubric(input.grading_rubric)
+        except ValueError as e:
+            return _grade_failure(str(e))
+        
+        # Create or update the grade
+        grade, _ = AssignmentGrade.objects.update_or_create(
+            submission=submission,
+            defaults={
+                'marks_obtained': input.marks_obtained,
+                'feedback': input.feedback or "",
+                'grading_rubric': grading_rubric,
+                'graded_by': user,
+            }
+        )
         
-        # Update submission status
+        # Update submission status with a direct UPDATE (post_save only acts on new rows)
+        now = timezone.now()
         submission.status = 'GRADED'
         submission.graded_by = user
-        submission.graded_at = timezone.now()
-        submission.save()
+        submission.graded_at = now
+        submission.updated_at = now
+        AssignmentSubmission.objects.filter(pk=submission.pk).update(
+            status=submission.status,
+            graded_by=user,
+            graded_at=now,
+            updated_at=now
+        )
+        forget_submission_counts(info, submission.assignment_id)
         
         return GradeAssignmentResponse(
             success=True,
@@ -456,6 +605,131 @@ class AssignmentMutation:
             grade=grade
         )
     
+    @strawberry.mutation
+    def bulk_grade_assignments(
+        self,
+        info: Info,
+        inputs: List[GradeAssignmentInput]
+    ) -> BulkGradeAssignmentResponse:
+        """
+        Faculty grades several submissions at once
+        
+        Either every grade is saved or none are.
+        """
+        user = info.context.request.user
+        
+        # Check if user is faculty
+        if get_role_code(info) not in FACULTY_ROLES:
+            raise Exception("Only faculty can grade assignments")
+        
+        submission_ids = [item.submission_id for item in inputs]
+        if not submission_ids:
+            return BulkGradeAssignmentResponse(success=False, message="No grades provided")
+        if len(set(submission_ids)) != len(submission_ids):
+            return BulkGradeAssignmentResponse(
+                success=False,
+                message="Each submission can only be graded once per request"
+            )
+        
+        # Get submissions, checking in the same query whether the user teaches them
+        teaches = TimetableEntry.objects.filter(
+            subject=OuterRef('assignment__subject'),
+            section=OuterRef('assignment__section'),
+            faculty=user,
+            is_active=True
+        )
+        submissions = AssignmentSubmission.objects.select_related(
+            *SUBMISSION_RELATED_FIELDS
+        ).annotate(
+            user_teaches=Exists(teaches)
+        ).in_bulk(submission_ids)
+        
+        # Validate
+        grading_rubrics = {}
+        for item in inputs:
+            submission = submissions.get(item.submission_id)
+            if submission is None:
+                raise Exception(f"Submission {item.submission_id} not found")
+            
+            is_valid, error_message = AssignmentValidator.validate_grading(
+                submission,
+                user,
+                item.marks_obtained,
+                teaches=submission.user_teaches
+            )
+            if is_valid:
+                try:
+                    grading_rubrics[item.submission_id] = _parse_grading_rubric(item.grading_rubric)
+                except ValueError as e:
+                    is_valid, error_message = False, str(e)
+            if not is_valid:
+                return BulkGradeAssignmentResponse(
+                    success=False,
+                    message=f"Submission {item.submission_id}: {error_message}"
+                )
+        
+        existing_grades = AssignmentGrade.objects.in_bulk(
+            submission_ids, field_name='submission_id'
+        )
+        
+        now = timezone.now()
+        grades = []
+        new_grades = []
+        updated_grades = []
+        for item in inputs:
+            submission = submissions[item.submission_id]
+            grade = existing_grades.get(item.submission_id)
+            if grade is None:
+                grade = AssignmentGrade(submission=submission)
+                new_grades.append(grade)
+            else:
+                grade.submission = submission
+                grade.updated_at = now  # bulk_update skips auto_now
+                updated_grades.append(grade)
+            
+            grade.marks_obtained = item.marks_obtained
+            grade.feedback = item.feedback or ""
+            grade.grading_rubric = grading_rubrics[item.submission_id]
+            grade.graded_by = user
+            grades.append(grade)
+            
+            submission.status = 'GRADED'
+            submission.graded_by = user
+            submission.graded_at = now
+        
+        with transaction.atomic():
+            AssignmentGrade.objects.bulk_create(new_grades)
+            AssignmentGrade.objects.bulk_update(
+                updated_grades,
+                ['marks_obtained', 'feedback', 'grading_rubric', 'graded_by', 'updated_at']
+            )
+            AssignmentSubmission.objects.filter(id__in=submission_ids).update(
+                status='GRADED',
+                graded_by=user,
+                graded_at=now,
+                updated_at=now
+            )
+        
+        # bulk_create() doesn't send post_save, which triggers the graded notifications
+        for grade in new_grades:
+            post_save.send(
+                sender=AssignmentGrade,
+                instance=grade,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=AssignmentGrade.objects.db,
+            )
+        
+        for assignment_id in {submission.assignment_id for submission in submissions.values()}:
+            forget_submission_counts(info, assignment_id)
+        
+        return BulkGradeAssignmentResponse(
+            success=True,
+            message=f"{len(grades)} submissions graded successfully",
+            grades=grades
+        )
+    
     @strawberry.mutation
     def return_submission(
         self,
@@ -468,43 +742,54 @@ class AssignmentMutation:
         user = info.context.request.user
         
         # Check if user is faculty
-        if user.role.code not in ['FACULTY', 'ADMIN', 'HOD']:
+        if get_role_code(info) not in FACULTY_ROLES:
             raise Exception("Only faculty can return submissions")
         
-        # Get submission
+        # Get submission, checking in the same query whether the user teaches it
+        teaches = TimetableEntry.objects.filter(
+            subject=OuterRef('assignment__subject'),
+            section=OuterRef('assignment__section'),
+            faculty=user,
+            is_active=True
+        )
         try:
-            submission = AssignmentSubmission.objects.get(id=input.submission_id)
+            submission = AssignmentSubmission.objects.select_related(
+                *SUBMISSION_RELATED_FIELDS, 'grade'
+            ).annotate(
+                user_teaches=Exists(teaches)
+            ).get(id=input.submission_id)
         except AssignmentSubmission.DoesNotExist:
             raise Exception("Submission not found")
         
         # Check authorization
         assignment = submission.assignment
-        if assignment.created_by.id != user.id:
-            from timetable.models import TimetableEntry
-            teaches = TimetableEntry.objects.filter(
-                subject=assignment.subject,
-                section=assignment.section,
-                faculty=user,
-                is_active=True
-            ).exists()
-            
-            if not teaches and user.role.code not in ['ADMIN', 'HOD']:
+        if assignment.created_by_id != user.id:
+            if not submission.user_teaches and get_role_code(info) not in ADMIN_ROLES:
                 raise Exception("Not authorized to return this submission")
         
-        # Return submission
+        # Return submission with direct UPDATEs (post_save only acts on new rows)
+        now = timezone.now()
         submission.status = 'RETURNED'
         submission.graded_by = user
-        submission.graded_at = timezone.now()
+        submission.graded_at = now
+        submission.updated_at = now
         
-        # Update or create grade with feedback
-        try:
-            grade = AssignmentGrade.objects.get(submission=submission)
+        # Update grade feedback if graded (don't create grade yet otherwise)
+        if hasattr(submission, 'grade'):
+            grade = submission.grade
             grade.feedback = input.feedback
-            grade.save()
-        except AssignmentGrade.DoesNotExist:
-            # Don't create grade yet, just update submission
-            pass
+            grade.updated_at = now
+            AssignmentGrade.objects.filter(pk=grade.pk).update(
+                feedback=grade.feedback,
+                updated_at=now
+            )
         
-        submission.save()
+        AssignmentSubmission.objects.filter(pk=submission.pk).update(
+            status=submission.status,
+            graded_by=user,
+            graded_at=now,
+            updated_at=now
+        )
+        forget_submission_counts(info, submission.assignment_id)
         
         return submission
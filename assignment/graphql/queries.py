@@ -1,12 +1,20 @@
 """
 GraphQL Queries for Assignment System
 """
+from functools import lru_cache
+
 import strawberry
 from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
 from typing import List, Optional
-from django.db.models import Q
+from django.db.models import (
+    BooleanField, Case, Count, DurationField, ExpressionWrapper, F, OuterRef,
+    Prefetch, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Now
 
 from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade
+from profile_management.models import Semester, StudentProfile
 from assignment.utils import (
     get_active_assignments_for_student,
     get_pending_assignments_for_student,
@@ -15,14 +23,129 @@ from assignment.utils import (
     get_assignment_statistics,
     get_student_assignment_statistics
 )
+from core.graphql.auth import get_role_code, get_student_profile
+from assignment.validators import ADMIN_ROLES, FACULTY_ROLES
+from assignment.graphql.loaders import (
+    SUBMISSION_RELATED_FIELDS,
+    get_assignment,
+    prime_sibling_assignments,
+    user_teaches,
+)
 from assignment.graphql.types import (
     AssignmentType,
     AssignmentSubmissionType,
     AssignmentGradeType,
+    AssignmentStatus,
     StudentAssignmentStatisticsType
 )
 
 
+# Large Assignment columns, loaded only when one of these GraphQL fields is selected
+DEFERRABLE_ASSIGNMENT_COLUMNS = {
+    'description': frozenset({'description'}),
+    'attachment': frozenset({'hasAttachment', 'attachmentUrl', 'attachmentFilename'}),
+}
+
+# Related objects, joined into list queries only when one of these GraphQL fields is selected
+ASSIGNMENT_RELATION_FIELDS = {
+    'subject': frozenset({'subject', 'subjectName'}),
+    'section': frozenset({'section', 'sectionName'}),
+    'semester': frozenset({'semester'}),
+    'created_by': frozenset({'createdBy', 'facultyName'}),
+}
+
+# Submission counts, annotated onto the queryset when one of these GraphQL fields is selected
+SUBMISSION_COUNT_FIELDS = frozenset({
+    'totalSubmissions', 'gradedSubmissions', 'pendingSubmissions', 'submissionPercentage',
+})
+
+# Due date checks, computed by the database against one NOW() for the whole list
+DUE_DATE_FIELDS = frozenset({'isOverdue', 'canSubmit', 'timeRemaining'})
+
+
+def _selected_field_names(selections):
+    """Collect the names of the selected fields, looking through fragments"""
+    names = set()
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            names.add(selection.name)
+        else:
+            names.update(_selected_field_names(selection.selections))
+    return names
+
+
+@lru_cache(maxsize=256)
+def _deferred_assignment_columns(requested_fields):
+    """Get the Assignment columns to defer for a set of selected field names, built once per selection set"""
+    return tuple(
+        column for column, graphql_fields in DEFERRABLE_ASSIGNMENT_COLUMNS.items()
+        if requested_fields.isdisjoint(graphql_fields)
+    )
+
+
+@lru_cache(maxsize=256)
+def _selected_assignment_relations(requested_fields):
+    """Get the Assignment relations to join for a set of selected field names"""
+    return tuple(
+        relation for relation, graphql_fields in ASSIGNMENT_RELATION_FIELDS.items()
+        if not requested_fields.isdisjoint(graphql_fields)
+    )
+
+
+def _load_requested_fields(info, assignments):
+    """
+    Shape an Assignment list queryset for the selected fields
+    
+    Skips large columns and joins the client didn't ask for, annotates submission counts
+    and due date checks when they are selected and, when nested submissions
+    are selected, fetches them for every assignment in one query.
+    """
+    requested_fields = frozenset(_selected_field_names(info.selected_fields[0].selections))
+    deferred_columns = _deferred_assignment_columns(requested_fields)
+    if deferred_columns:
+        assignments = assignments.defer(*deferred_columns)
+    relations = _selected_assignment_relations(requested_fields)
+    assignments = assignments.select_related(None)
+    if relations:
+        # select_related() without arguments would follow every foreign key
+        assignments = assignments.select_related(*relations)
+    if not requested_fields.isdisjoint(SUBMISSION_COUNT_FIELDS):
+        section_students = StudentProfile.objects.filter(
+            section=OuterRef('section'),
+            is_active=True
+        ).order_by().values('section').annotate(count=Count('id')).values('count')
+        assignments = assignments.annotate(
+            _total_submissions=Count('submissions'),
+            _graded_submissions=Count('submissions', filter=Q(submissions__status='GRADED')),
+            _section_students=Coalesce(Subquery(section_students), 0),
+        )
+    if not requested_fields.isdisjoint(DUE_DATE_FIELDS):
+        assignments = assignments.annotate(
+            _due_in=ExpressionWrapper(F('due_date') - Now(), output_field=DurationField()),
+            _can_submit=Case(
+                When(status='PUBLISHED', due_date__gte=Now(), then=Value(True)),
+                When(
+                    status='PUBLISHED',
+                    allow_late_submission=True,
+                    late_submission_deadline__gte=Now(),
+                    then=Value(True)
+                ),
+                default=Value(False),
+                output_field=BooleanField()
+            ),
+        )
+    if 'submissions' in requested_fields:
+        assignments = assignments.prefetch_related(
+            Prefetch(
+                'submissions',
+                queryset=AssignmentSubmission.objects.select_related(
+                    'student__user', 'graded_by', 'grade'
+                )
+            )
+        )
+    return assignments
+
+
 @strawberry.type
 class AssignmentQuery:
     """Assignment-related queries"""
@@ -34,22 +157,24 @@ class AssignmentQuery:
         """
         user = info.context.request.user
         
+        # Fetch aliased sibling `assignment(id: ...)` fields in the same query
+        prime_sibling_assignments(info)
+        
         try:
-            assignment = Assignment.objects.get(id=id)
+            assignment = get_assignment(info, id)
         except Assignment.DoesNotExist:
             return None
         
         # Check permissions
-        if user.role.code == 'STUDENT':
+        if get_role_code(info) == 'STUDENT':
             # Students can only see published assignments for their section
-            from profile_management.models import StudentProfile
             try:
-                student_profile = StudentProfile.objects.get(user=user)
+                student_profile = get_student_profile(info)
                 if assignment.section != student_profile.section or assignment.status == 'DRAFT':
                     return None
             except StudentProfile.DoesNotExist:
                 return None
-        elif user.role.code == 'FACULTY':
+        elif get_role_code(info) == 'FACULTY':
             # Faculty can see assignments they created
             if assignment.created_by.id != user.id:
                 return None
@@ -63,19 +188,24 @@ class AssignmentQuery:
         section_id: Optional[int] = None,
         subject_id: Optional[int] = None,
         semester_id: Optional[int] = None,
-        status: Optional[str] = None
+        status: Optional[AssignmentStatus] = None,
+        limit: int = 50,
+        offset: int = 0
     ) -> List[AssignmentType]:
         """
-        Get list of assignments with filters
+        Get list of assignments with filters, latest due date first
+        
+        Args:
+            limit: Maximum number of assignments to return
+            offset: Number of assignments to skip
         """
         user = info.context.request.user
         
         # Base query based on user role
-        if user.role.code == 'STUDENT':
+        if get_role_code(info) == 'STUDENT':
             # Students see only published assignments for their section
-            from profile_management.models import StudentProfile
             try:
-                student_profile = StudentProfile.objects.get(user=user)
+                student_profile = get_student_profile(info)
                 assignments = Assignment.objects.filter(
                     section=student_profile.section,
                     status='PUBLISHED'
@@ -83,11 +213,11 @@ class AssignmentQuery:
             except StudentProfile.DoesNotExist:
                 return []
         
-        elif user.role.code == 'FACULTY':
+        elif get_role_code(info) == 'FACULTY':
             # Faculty see assignments they created
             assignments = Assignment.objects.filter(created_by=user)
         
-        elif user.role.code in ['ADMIN', 'HOD']:
+        elif get_role_code(info) in ADMIN_ROLES:
             # Admin sees all assignments
             assignments = Assignment.objects.all()
         
@@ -105,9 +235,11 @@ class AssignmentQuery:
             assignments = assignments.filter(semester_id=semester_id)
         
         if status:
-            assignments = assignments.filter(status=status)
+            assignments = assignments.filter(status=status.value)
         
-        return list(assignments.select_related('subject', 'section', 'semester', 'created_by'))
+        assignments = _load_requested_fields(info, assignments).order_by('-due_date', '-id')
+        
+        return list(assignments[offset:offset + limit])
     
     @strawberry.field
     def my_assignments(self, info: Info) -> List[AssignmentType]:
@@ -116,18 +248,17 @@ class AssignmentQuery:
         """
         user = info.context.request.user
         
-        if user.role.code == 'STUDENT':
-            from profile_management.models import StudentProfile
+        if get_role_code(info) == 'STUDENT':
             try:
-                student_profile = StudentProfile.objects.get(user=user)
+                student_profile = get_student_profile(info)
                 assignments = get_active_assignments_for_student(student_profile)
-                return list(assignments)
+                return list(_load_requested_fields(info, assignments))
             except StudentProfile.DoesNotExist:
                 return []
         
-        elif user.role.code == 'FACULTY':
+        elif get_role_code(info) == 'FACULTY':
             assignments = get_faculty_assignments(user)
-            return list(assignments)
+            return list(_load_requested_fields(info, assignments))
         
         return []
     
@@ -136,16 +267,13 @@ class AssignmentQuery:
         """
         Get pending assignments for current student
         """
-        user = info.context.request.user
-        
-        if user.role.code != 'STUDENT':
+        if get_role_code(info) != 'STUDENT':
             raise Exception("Only students can query pending assignments")
         
-        from profile_management.models import StudentProfile
         try:
-            student_profile = StudentProfile.objects.get(user=user)
+            student_profile = get_student_profile(info)
             assignments = get_pending_assignments_for_student(student_profile)
-            return list(assignments)
+            return list(_load_requested_fields(info, assignments))
         except StudentProfile.DoesNotExist:
             return []
     
@@ -154,16 +282,13 @@ class AssignmentQuery:
         """
         Get overdue assignments for current student
         """
-        user = info.context.request.user
-        
-        if user.role.code != 'STUDENT':
+        if get_role_code(info) != 'STUDENT':
             raise Exception("Only students can query overdue assignments")
         
-        from profile_management.models import StudentProfile
         try:
-            student_profile = StudentProfile.objects.get(user=user)
+            student_profile = get_student_profile(info)
             assignments = get_overdue_assignments_for_student(student_profile)
-            return list(assignments)
+            return list(_load_requested_fields(info, assignments))
         except StudentProfile.DoesNotExist:
             return []
     
@@ -178,26 +303,18 @@ class AssignmentQuery:
         """
         user = info.context.request.user
         
-        if user.role.code not in ['FACULTY', 'ADMIN', 'HOD']:
+        if get_role_code(info) not in FACULTY_ROLES:
             raise Exception("Only faculty can view all submissions")
         
         try:
-            assignment = Assignment.objects.get(id=assignment_id)
+            assignment = get_assignment(info, assignment_id)
         except Assignment.DoesNotExist:
             raise Exception("Assignment not found")
         
         # Check if faculty is authorized
-        if user.role.code == 'FACULTY':
-            if assignment.created_by.id != user.id:
-                from timetable.models import TimetableEntry
-                teaches = TimetableEntry.objects.filter(
-                    subject=assignment.subject,
-                    section=assignment.section,
-                    faculty=user,
-                    is_active=True
-                ).exists()
-                
-                if not teaches:
+        if get_role_code(info) == 'FACULTY':
+            if assignment.created_by_id != user.id:
+                if not user_teaches(info, assignment.subject_id, assignment.section_id):
                     raise Exception("Not authorized to view these submissions")
         
         submissions = assignment.submissions.all().select_related(
@@ -213,17 +330,14 @@ class AssignmentQuery:
         """
         Get all submissions for current student
         """
-        user = info.context.request.user
-        
-        if user.role.code != 'STUDENT':
+        if get_role_code(info) != 'STUDENT':
             raise Exception("Only students can query their submissions")
         
-        from profile_management.models import StudentProfile
         try:
-            student_profile = StudentProfile.objects.get(user=user)
+            student_profile = get_student_profile(info)
             submissions = AssignmentSubmission.objects.filter(
                 student=student_profile
-            ).select_related('assignment', 'grade', 'graded_by')
+            ).select_related('assignment', 'student', 'grade', 'graded_by')
             
             return list(submissions)
         except StudentProfile.DoesNotExist:
@@ -237,27 +351,22 @@ class AssignmentQuery:
         user = info.context.request.user
         
         try:
-            submission = AssignmentSubmission.objects.get(id=id)
+            submission = AssignmentSubmission.objects.select_related(
+                *SUBMISSION_RELATED_FIELDS, 'grade', 'graded_by'
+            ).get(id=id)
         except AssignmentSubmission.DoesNotExist:
             return None
         
         # Check permissions
-        if user.role.code == 'STUDENT':
+        if get_role_code(info) == 'STUDENT':
             # Students can only see their own submissions
             if submission.student.user.id != user.id:
                 return None
-        elif user.role.code == 'FACULTY':
+        elif get_role_code(info) == 'FACULTY':
             # Faculty can see submissions for their assignments
-            if submission.assignment.created_by.id != user.id:
-                from timetable.models import TimetableEntry
-                teaches = TimetableEntry.objects.filter(
-                    subject=submission.assignment.subject,
-                    section=submission.assignment.section,
-                    faculty=user,
-                    is_active=True
-                ).exists()
-                
-                if not teaches:
+            assignment = submission.assignment
+            if assignment.created_by_id != user.id:
+                if not user_teaches(info, assignment.subject_id, assignment.section_id):
                     return None
         
         return submission
@@ -272,14 +381,10 @@ class AssignmentQuery:
         """
         Get assignment statistics for a student
         """
-        user = info.context.request.user
-        
         # Determine which student
-        from profile_management.models import StudentProfile
-        
         if student_id:
             # Faculty/Admin querying specific student
-            if user.role.code not in ['FACULTY', 'ADMIN', 'HOD']:
+            if get_role_code(info) not in FACULTY_ROLES:
                 raise Exception("Not authorized")
             
             try:
@@ -288,36 +393,26 @@ class AssignmentQuery:
                 raise Exception("Student not found")
         else:
             # Student querying their own stats
-            if user.role.code != 'STUDENT':
+            if get_role_code(info) != 'STUDENT':
                 raise Exception("Student ID required for non-student users")
             
             try:
-                student_profile = StudentProfile.objects.get(user=user)
+                student_profile = get_student_profile(info)
             except StudentProfile.DoesNotExist:
                 raise Exception("Student profile not found")
         
         # Get semester if provided
         semester = None
         if semester_id:
-            from profile_management.models import Semester
             try:
                 semester = Semester.objects.get(id=semester_id)
             except Semester.DoesNotExist:
                 pass
         
         # Get statistics
-        stats = get_student_assignment_statistics(student_profile, semester)
-        
+        # The statistics dict keys match the type's fields
         return StudentAssignmentStatisticsType(
-            total_assignments=stats['total_assignments'],
-            total_submitted=stats['total_submitted'],
-            pending_submission=stats['pending_submission'],
-            submission_percentage=stats['submission_percentage'],
-            graded_count=stats['graded_count'],
-            pending_grading=stats['pending_grading'],
-            overdue_count=stats['overdue_count'],
-            average_marks=stats['average_marks'],
-            average_percentage=stats['average_percentage']
+            **get_student_assignment_statistics(student_profile, semester)
         )
     
     @strawberry.field
@@ -327,15 +422,12 @@ class AssignmentQuery:
         """
         user = info.context.request.user
         
-        if user.role.code not in ['FACULTY', 'ADMIN', 'HOD']:
+        if get_role_code(info) not in FACULTY_ROLES:
             raise Exception("Only faculty can query pending grading")
         
-        # Get assignments created by this faculty
-        assignments = Assignment.objects.filter(created_by=user)
-        
-        # Get submissions pending grading
+        # Get submissions pending grading on assignments created by this faculty
         submissions = AssignmentSubmission.objects.filter(
-            assignment__in=assignments,
+            assignment__created_by=user,
             status__in=['SUBMITTED', 'RESUBMITTED']
         ).select_related('student__user', 'assignment').order_by('submitted_at')
         
@@ -1,13 +1,57 @@
 """
 GraphQL types for Assignment System
 """
+import os
 import strawberry
 import strawberry_django
+from strawberry.file_uploads import Upload
+from strawberry.types import Info
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
+from enum import Enum
 
 from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade
+from assignment.caches import get_active_student_count
+from assignment.graphql.loaders import get_request_now
+from assignment.utils import get_assignment_statistics
+
+
+@strawberry.enum
+class AssignmentKind(Enum):
+    INDIVIDUAL = "INDIVIDUAL"
+    GROUP = "GROUP"
+    LAB = "LAB"
+    PROJECT = "PROJECT"
+    QUIZ = "QUIZ"
+
+
+@strawberry.enum
+class AssignmentStatus(Enum):
+    DRAFT = "DRAFT"
+    PUBLISHED = "PUBLISHED"
+    CLOSED = "CLOSED"
+    GRADED = "GRADED"
+
+
+def _file_name(instance, field_name):
+    """Get the stored name of a FileField ('' if empty), without building a FieldFile"""
+    if field_name in instance.__dict__:
+        # Filename string until the field is first accessed, then a (Field)File
+        value = instance.__dict__[field_name]
+    else:
+        value = getattr(instance, field_name)
+    if not value:
+        return ''
+    return value if isinstance(value, str) else value.name
+
+
+def _file_url(instance, field_name):
+    """Get the URL of a FileField from its stored name, or None if empty"""
+    name = _file_name(instance, field_name)
+    if not name:
+        return None
+    return instance._meta.get_field(field_name).storage.url(name)
 
 
 # Input Types
@@ -19,13 +63,15 @@ class CreateAssignmentInput:
     semester_id: int
     title: str
     description: str
-    assignment_type: str
+    assignment_type: AssignmentKind
     due_date: datetime
     max_marks: Decimal
     weightage: Decimal
     allow_late_submission: bool = False
     late_submission_deadline: Optional[datetime] = None
-    # Base64 file upload
+    # Multipart file upload (preferred, streamed to storage)
+    attachment: Optional[Upload] = None
+    # Legacy base64 file upload
     attachment_data: Optional[str] = None  # Base64 encoded file (data:type;base64,...)
     attachment_filename: Optional[str] = None  # Original filename
 
@@ -41,7 +87,9 @@ class UpdateAssignmentInput:
     weightage: Optional[Decimal] = None
     allow_late_submission: Optional[bool] = None
     late_submission_deadline: Optional[datetime] = None
-    # Base64 file upload
+    # Multipart file upload (preferred, streamed to storage)
+    attachment: Optional[Upload] = None
+    # Legacy base64 file upload
     attachment_data: Optional[str] = None  # Base64 encoded file
     attachment_filename: Optional[str] = None  # Original filename
 
@@ -78,8 +126,8 @@ class AssignmentType:
     id: strawberry.ID
     title: str
     description: str
-    assignment_type: str
-    status: str
+    assignment_type: AssignmentKind
+    status: AssignmentStatus
     due_date: datetime
     published_date: Optional[datetime]
     allow_late_submission: bool
@@ -89,33 +137,55 @@ class AssignmentType:
     created_at: datetime
     updated_at: datetime
     
-    # Properties
-    is_overdue: bool
-    can_submit: bool
-    total_submissions: int
-    graded_submissions: int
-    pending_submissions: int
+    # Due date checks, read from the list query's annotations when present
+    @strawberry.field
+    def is_overdue(self, info: Info) -> bool:
+        """Check if assignment is past due date"""
+        if not hasattr(self, '_due_in'):
+            return self.is_overdue_at(get_request_now(info))
+        return self._due_in < timedelta(0)
+    
+    @strawberry.field
+    def can_submit(self, info: Info) -> bool:
+        """Check if students can still submit"""
+        can_submit = getattr(self, '_can_submit', None)
+        if can_submit is None:
+            return self.can_submit_at(get_request_now(info))
+        return can_submit
     
     # Relationships
-    @strawberry_django.field
-    def subject(self) -> 'SubjectType':
-        return self.subject
+    subject: 'SubjectType'
+    section: 'SectionType'
+    semester: 'SemesterType'
+    created_by: 'UserType'
     
     @strawberry_django.field
-    def section(self) -> 'SectionType':
-        return self.section
+    def submissions(self) -> List['AssignmentSubmissionType']:
+        # List queries prefetch submissions when selected; read that list directly
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'submissions' in prefetched:
+            return prefetched['submissions']
+        return list(self.submissions.all())
     
-    @strawberry_django.field
-    def semester(self) -> 'SemesterType':
-        return self.semester
+    # Submission counts, read from the list query's annotations when present
+    @strawberry.field
+    def total_submissions(self) -> int:
+        """Get total number of submissions"""
+        total = getattr(self, '_total_submissions', None)
+        return self.total_submissions if total is None else total
     
-    @strawberry_django.field
-    def created_by(self) -> 'UserType':
-        return self.created_by
+    @strawberry.field
+    def graded_submissions(self) -> int:
+        """Get number of graded submissions"""
+        graded = getattr(self, '_graded_submissions', None)
+        return self.graded_submissions if graded is None else graded
     
-    @strawberry_django.field
-    def submissions(self) -> List['AssignmentSubmissionType']:
-        return self.submissions.all()
+    @strawberry.field
+    def pending_submissions(self) -> int:
+        """Get number of pending submissions"""
+        if not hasattr(self, '_section_students'):
+            return self.pending_submissions
+        return self._section_students - self._total_submissions
     
     # Custom fields
     @strawberry.field
@@ -134,13 +204,14 @@ class AssignmentType:
         return self.created_by.email or self.created_by.register_number or "Unknown"
     
     @strawberry.field
-    def time_remaining(self) -> Optional[str]:
+    def time_remaining(self, info: Info) -> Optional[str]:
         """Get human-readable time remaining"""
-        if self.is_overdue:
-            return "Overdue"
+        delta = getattr(self, '_due_in', None)
+        if delta is None:
+            delta = self.due_date - get_request_now(info)
         
-        from django.utils import timezone
-        delta = self.due_date - timezone.now()
+        if delta < timedelta(0):
+            return "Overdue"
         
         if delta.days > 0:
             return f"{delta.days} day(s)"
@@ -152,56 +223,45 @@ class AssignmentType:
             return f"{minutes} minute(s)"
     
     @strawberry.field
-    def submission_percentage(self) -> float:
+    def submission_percentage(self, info: Info) -> float:
         """Get submission percentage"""
-        from profile_management.models import StudentProfile
-        total_students = StudentProfile.objects.filter(
-            section=self.section,
-            is_active=True
-        ).count()
+        if hasattr(self, '_section_students'):
+            total_students = self._section_students
+            total_submissions = self._total_submissions
+        else:
+            total_students = get_active_student_count(self.section_id, info.context)
+            total_submissions = self.total_submissions
         
         if total_students == 0:
             return 0.0
         
-        return round((self.total_submissions / total_students) * 100, 2)
+        return round((total_submissions / total_students) * 100, 2)
     
     @strawberry.field
-    def statistics(self) -> 'AssignmentStatisticsType':
+    def statistics(self, info: Info) -> 'AssignmentStatisticsType':
         """Get assignment statistics"""
-        from assignment.utils import get_assignment_statistics
-        stats = get_assignment_statistics(self)
-        return AssignmentStatisticsType(
-            total_students=stats['total_students'],
-            total_submissions=stats['total_submissions'],
-            not_submitted=stats['not_submitted'],
-            submission_percentage=stats['submission_percentage'],
-            graded_count=stats['graded_count'],
-            pending_grading=stats['pending_grading'],
-            late_submissions=stats['late_submissions'],
-            average_marks=stats['average_marks'],
-            average_percentage=stats['average_percentage']
-        )
+        # The statistics dict keys match the type's fields
+        return AssignmentStatisticsType(**get_assignment_statistics(self, info.context))
     
     # File attachment fields
     @strawberry.field
     def has_attachment(self) -> bool:
         """Check if assignment has attachment"""
-        return bool(self.attachment)
+        return bool(_file_name(self, 'attachment'))
     
     @strawberry.field
     def attachment_url(self) -> Optional[str]:
         """Get attachment URL"""
-        if self.attachment:
-            return self.attachment.url
-        return None
+        return _file_url(self, 'attachment')
     
     @strawberry.field
     def attachment_filename(self) -> Optional[str]:
         """Get attachment filename"""
-        if self.attachment:
-            import os
-            return os.path.basename(self.attachment.name)
-        return None
+        name = _file_name(self, 'attachment')
+        if not name:
+            return None
+        # Attachments uploaded before the original name was stored fall back to the storage name
+        return self.attachment_original_name or os.path.basename(name)
 
 
 @strawberry_django.type(AssignmentSubmission)
@@ -218,17 +278,9 @@ class AssignmentSubmissionType:
     updated_at: datetime
     
     # Relationships
-    @strawberry_django.field
-    def assignment(self) -> AssignmentType:
-        return self.assignment
-    
-    @strawberry_django.field
-    def student(self) -> 'StudentProfileType':
-        return self.student
-    
-    @strawberry_django.field
-    def graded_by(self) -> Optional['UserType']:
-        return self.graded_by
+    assignment: AssignmentType
+    student: 'StudentProfileType'
+    graded_by: Optional['UserType']
     
     @strawberry_django.field
     def grade(self) -> Optional['AssignmentGradeType']:
@@ -238,7 +290,8 @@ class AssignmentSubmissionType:
     @strawberry.field
     def student_name(self) -> str:
         """Get student name"""
-        return f"{self.student.user.first_name} {self.student.user.last_name}"
+        # Names live on the student profile, the User model has none
+        return self.student.full_name
     
     @strawberry.field
     def student_register_number(self) -> str:
@@ -253,14 +306,12 @@ class AssignmentSubmissionType:
     @strawberry.field
     def has_attachment(self) -> bool:
         """Check if submission has attachment"""
-        return bool(self.attachment)
+        return bool(_file_name(self, 'attachment'))
     
     @strawberry.field
     def attachment_url(self) -> Optional[str]:
         """Get attachment URL"""
-        if self.attachment:
-            return self.attachment.url
-        return None
+        return _file_url(self, 'attachment')
 
 
 @strawberry_django.type(AssignmentGrade)
@@ -278,13 +329,8 @@ class AssignmentGradeType:
     grade_letter: str
     
     # Relationships
-    @strawberry_django.field
-    def submission(self) -> AssignmentSubmissionType:
-        return self.submission
-    
-    @strawberry_django.field
-    def graded_by(self) -> 'UserType':
-        return self.graded_by
+    submission: AssignmentSubmissionType
+    graded_by: 'UserType'
     
     # Custom fields
     @strawberry.field
@@ -338,6 +384,14 @@ class GradeAssignmentResponse:
     grade: Optional[AssignmentGradeType] = None
 
 
+@strawberry.type
+class BulkGradeAssignmentResponse:
+    """Response for bulk grading"""
+    success: bool
+    message: str
+    grades: List[AssignmentGradeType] = strawberry.field(default_factory=list)
+
+
 # Import types from other apps (at the end to avoid circular imports)
 from timetable.graphql.types import SubjectType, SemesterType
 from core.graphql.types import SectionType, UserType
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-15 10:00
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0002_initial'),
+        ('core', '0001_initial'),
+        # pg_trgm (for gin_trgm_ops) is installed once by the public schema
+        ('tenants', '0002_trigram_extension'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['section', 'status', 'due_date'], name='assignment__section_882819_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['created_by', 'status'], name='assignment__created_3150a5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='assignment_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
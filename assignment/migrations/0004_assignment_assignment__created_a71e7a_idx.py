@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-15 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0003_assignment_assignment__section_882819_idx_and_more'),
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['created_by', 'due_date'], name='assignment__created_a71e7a_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-15 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0004_assignment_assignment__created_a71e7a_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='attachment_original_name',
+            field=models.CharField(blank=True, default='', help_text='Filename the attachment was uploaded with', max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-15 14:45
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0005_assignment_attachment_original_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['submitted_at'], name='sub_submitted_brin'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-15 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0006_assignmentsubmission_sub_submitted_brin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['due_date'], name='assignment_pub_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(condition=models.Q(('status', 'PUBLISHED')), fields=['section', 'semester', 'due_date'], name='assignment_pub_sec_sem_idx'),
+        ),
+    ]
@@ -3,12 +3,26 @@ Assignment Models for College Management System
 Faculty creates assignments, students submit, faculty grades
 """
 from django.db import models
+from django.db.models.signals import post_save
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.conf import settings
+from bisect import bisect_right
 import os
 
 
+# Lowest percentage for each letter grade above 'F', ascending
+GRADE_LETTER_THRESHOLDS = (40, 50, 60, 70, 80, 90)
+GRADE_LETTERS = ('F', 'D', 'C', 'B', 'B+', 'A', 'A+')
+
+
+def get_grade_letter(percentage):
+    """Map a percentage to its letter grade with a binary search over the thresholds"""
+    return GRADE_LETTERS[bisect_right(GRADE_LETTER_THRESHOLDS, percentage)]
+
+
 def assignment_file_path(instance, filename):
     """
     Generate unique path for assignment files
@@ -106,6 +120,12 @@ class Assignment(models.Model):
         blank=True,
         help_text="Optional assignment file (PDF, DOC, etc.)"
     )
+    attachment_original_name = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        help_text="Filename the attachment was uploaded with"
+    )
     
     # Timing
     published_date = models.DateTimeField(
@@ -158,6 +178,23 @@ class Assignment(models.Model):
         indexes = [
             models.Index(fields=['status', 'due_date']),
             models.Index(fields=['subject', 'section']),
+            models.Index(fields=['section', 'status', 'due_date']),
+            models.Index(fields=['created_by', 'status']),
+            models.Index(fields=['created_by', 'due_date']),
+            # Partial indexes over published assignments only, for the student
+            # listings and the periodic deadline scans
+            models.Index(
+                fields=['due_date'],
+                name='assignment_pub_due_idx',
+                condition=models.Q(status='PUBLISHED'),
+            ),
+            models.Index(
+                fields=['section', 'semester', 'due_date'],
+                name='assignment_pub_sec_sem_idx',
+                condition=models.Q(status='PUBLISHED'),
+            ),
+            # Trigram index so admin title searches (ILIKE '%...%') can use an index
+            GinIndex(fields=['title'], name='assignment_title_trgm_idx', opclasses=['gin_trgm_ops']),
         ]
     
     def __str__(self):
@@ -178,15 +215,22 @@ class Assignment(models.Model):
     @property
     def is_overdue(self):
         """Check if assignment is past due date"""
-        return timezone.now() > self.due_date
+        return self.is_overdue_at(timezone.now())
     
     @property
     def can_submit(self):
         """Check if students can still submit"""
+        return self.can_submit_at(timezone.now())
+    
+    def is_overdue_at(self, now):
+        """Check if assignment is past due date at the given time"""
+        return now > self.due_date
+    
+    def can_submit_at(self, now):
+        """Check if students can submit at the given time"""
         if self.status != 'PUBLISHED':
             return False
         
-        now = timezone.now()
         if now <= self.due_date:
             return True
         
@@ -195,25 +239,29 @@ class Assignment(models.Model):
         
         return False
     
+    @cached_property
+    def _submission_counts(self):
+        """Total and graded submission counts, fetched together in one query"""
+        return self.submissions.aggregate(
+            total=models.Count('id'),
+            graded=models.Count('id', filter=models.Q(status='GRADED'))
+        )
+    
     @property
     def total_submissions(self):
         """Get total number of submissions"""
-        return self.submissions.count()
+        return self._submission_counts['total']
     
     @property
     def graded_submissions(self):
         """Get number of graded submissions"""
-        return self.submissions.filter(status='GRADED').count()
+        return self._submission_counts['graded']
     
     @property
     def pending_submissions(self):
         """Get number of pending submissions"""
-        from profile_management.models import StudentProfile
-        total_students = StudentProfile.objects.filter(
-            section=self.section,
-            is_active=True
-        ).count()
-        return total_students - self.total_submissions
+        from assignment.caches import get_active_student_count
+        return get_active_student_count(self.section_id) - self.total_submissions
 
 
 class AssignmentSubmission(models.Model):
@@ -299,6 +347,8 @@ class AssignmentSubmission(models.Model):
         indexes = [
             models.Index(fields=['assignment', 'status']),
             models.Index(fields=['student', 'submitted_at']),
+            # submitted_at is set on insert only, so a tiny BRIN index serves time range scans
+            BrinIndex(fields=['submitted_at'], name='sub_submitted_brin'),
         ]
     
     def __str__(self):
@@ -317,8 +367,65 @@ class AssignmentSubmission(models.Model):
     def save(self, *args, **kwargs):
         """Override save to set is_late flag"""
         if not self.pk:  # New submission
-            self.is_late = timezone.now() > self.assignment.due_date
+            if AssignmentSubmission.assignment.is_cached(self):
+                due_date = self.assignment.due_date
+            else:
+                # Only the due date is needed, don't load the whole assignment
+                due_date = Assignment.objects.filter(
+                    pk=self.assignment_id
+                ).values_list('due_date', flat=True).get()
+            self.is_late = timezone.now() > due_date
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def bulk_create_submissions(cls, rows):
+        """
+        Create several submissions at once, setting is_late for each
+        
+        Assignments are loaded in one query and is_late is computed against a
+        single timestamp. bulk_create() skips save() and post_save, so the
+        post_save signal (which sends the submission notifications) is sent here.
+        
+        Args:
+            rows: Dicts of submission field values, each with an assignment_id
+        
+        Returns:
+            list: The created submissions
+        
+        Raises:
+            ValidationError: If a row references an assignment that doesn't exist
+        """
+        assignment_ids = {row['assignment_id'] for row in rows}
+        assignments = Assignment.objects.select_related('created_by').in_bulk(assignment_ids)
+        
+        missing_ids = assignment_ids - assignments.keys()
+        if missing_ids:
+            raise ValidationError(
+                f"Assignments not found: {', '.join(str(assignment_id) for assignment_id in sorted(missing_ids))}"
+            )
+        
+        now = timezone.now()
+        submissions = []
+        for row in rows:
+            values = dict(row)
+            assignment = assignments[values.pop('assignment_id')]
+            submissions.append(cls(
+                assignment=assignment,
+                is_late=now > assignment.due_date,
+                **values
+            ))
+        
+        submissions = cls.objects.bulk_create(submissions)
+        for submission in submissions:
+            post_save.send(
+                sender=cls,
+                instance=submission,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=cls.objects.db,
+            )
+        return submissions
 
 
 class AssignmentGrade(models.Model):
@@ -391,18 +498,9 @@ class AssignmentGrade(models.Model):
     @property
     def grade_letter(self):
         """Calculate letter grade"""
-        percentage = self.percentage
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 80:
-            return 'A'
-        elif percentage >= 70:
-            return 'B+'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C'
-        elif percentage >= 40:
-            return 'D'
-        else:
-            return 'F'
+        max_marks = self.submission.assignment.max_marks
+        if max_marks <= 0:
+            return get_grade_letter(0)
+        # Thresholds are whole percentages, so the floored integer percentage
+        # gets the same letter without a full precision Decimal division
+        return get_grade_letter(int(self.marks_obtained * 100 // max_marks))
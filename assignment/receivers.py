@@ -0,0 +1,31 @@
+"""
+Signal receivers keeping the Assignment caches in sync
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from assignment.caches import invalidate_active_student_count
+
+
+@receiver(pre_save, sender='profile_management.StudentProfile')
+def capture_student_profile_section(sender, instance, **kwargs):
+    """Remember the section stored before this save, to detect section moves"""
+    if not instance.pk:
+        return
+    
+    instance._previous_section_id = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('section_id', flat=True).first()
+
+
+@receiver(post_save, sender='profile_management.StudentProfile')
+@receiver(post_delete, sender='profile_management.StudentProfile')
+def handle_student_profile_change(sender, instance, **kwargs):
+    """A student joining, leaving or (de)activating changes their section's size"""
+    if instance.section_id:
+        invalidate_active_student_count(instance.section_id)
+    
+    # A student moved to another section also leaves the old one
+    previous_section_id = getattr(instance, '_previous_section_id', None)
+    if previous_section_id and previous_section_id != instance.section_id:
+        invalidate_active_student_count(previous_section_id)
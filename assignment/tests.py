@@ -1,7 +1,10 @@
 """
 Tests for Assignment System
 """
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, TestCase
 from django.utils import timezone
 from datetime import timedelta
 
@@ -9,71 +12,76 @@ from core.models import User, Role, Department, Section
 from profile_management.models import StudentProfile
 from timetable.models import Subject
 from profile_management.models import Semester, AcademicYear
-from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade
+from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade, get_grade_letter
 from assignment.validators import AssignmentValidator
+from assignment.utils import get_assignment_statistics, get_student_assignment_statistics
+from assignment.caches import get_active_student_count
 
 
-class AssignmentModelTest(TestCase):
-    """Test Assignment model"""
+class AssignmentTestData(TestCase):
+    """Shared fixtures, created once per test class and rolled back between tests"""
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data"""
-        # Create role
-        self.faculty_role = Role.objects.create(name='FACULTY')
-        self.student_role = Role.objects.create(name='STUDENT')
+        # Create roles
+        cls.faculty_role, cls.student_role = Role.objects.bulk_create([
+            Role(name='FACULTY'),
+            Role(name='STUDENT'),
+        ])
         
         # Create users
-        self.faculty_user = User.objects.create(
-            email='faculty@test.com',
-            role=self.faculty_role
-        )
-        self.student_user = User.objects.create(
-            email='student@test.com',
-            role=self.student_role
-        )
+        cls.faculty_user, cls.student_user = User.objects.bulk_create([
+            User(email='faculty@test.com', role=cls.faculty_role),
+            User(email='student@test.com', role=cls.student_role),
+        ])
         
         # Create department
-        self.department = Department.objects.create(
+        cls.department = Department.objects.create(
             name='Computer Science',
             code='CS'
         )
         
         # Create section
-        self.section = Section.objects.create(
+        cls.section = Section.objects.create(
             name='CS-A',
-            department=self.department
+            department=cls.department
         )
         
         # Create academic year and semester
-        self.academic_year = AcademicYear.objects.create(
+        cls.academic_year = AcademicYear.objects.create(
             year='2025-2026',
             start_date=timezone.now().date(),
             end_date=timezone.now().date() + timedelta(days=365)
         )
-        self.semester = Semester.objects.create(
-            academic_year=self.academic_year,
+        cls.semester = Semester.objects.create(
+            academic_year=cls.academic_year,
             number=1,
             start_date=timezone.now().date(),
             end_date=timezone.now().date() + timedelta(days=180)
         )
         
         # Create subject
-        self.subject = Subject.objects.create(
+        cls.subject = Subject.objects.create(
             code='CS101',
             name='Data Structures',
-            department=self.department,
+            department=cls.department,
             semester_number=1,
             credits=4.0,
             subject_type='THEORY'
         )
         
         # Create student profile
-        self.student_profile = StudentProfile.objects.create(
-            user=self.student_user,
+        cls.student_profile = StudentProfile.objects.create(
+            user=cls.student_user,
             register_number='2025001',
-            section=self.section,
-            semester=self.semester
+            section=cls.section,
+            semester=cls.semester
         )
+
+
+class AssignmentModelTest(AssignmentTestData):
+    """Test Assignment model"""
     
     def test_create_assignment(self):
         """Test creating an assignment"""
@@ -139,74 +147,20 @@ class AssignmentModelTest(TestCase):
         self.assertFalse(assignment.can_submit)
 
 
-class AssignmentSubmissionModelTest(TestCase):
+class AssignmentSubmissionModelTest(AssignmentTestData):
     """Test AssignmentSubmission model"""
     
-    def setUp(self):
-        """Set up test data (reuse from AssignmentModelTest)"""
-        # Create role
-        self.faculty_role = Role.objects.create(name='FACULTY')
-        self.student_role = Role.objects.create(name='STUDENT')
-        
-        # Create users
-        self.faculty_user = User.objects.create(
-            email='faculty@test.com',
-            role=self.faculty_role
-        )
-        self.student_user = User.objects.create(
-            email='student@test.com',
-            role=self.student_role
-        )
-        
-        # Create department
-        self.department = Department.objects.create(
-            name='Computer Science',
-            code='CS'
-        )
-        
-        # Create section
-        self.section = Section.objects.create(
-            name='CS-A',
-            department=self.department
-        )
-        
-        # Create academic year and semester
-        self.academic_year = AcademicYear.objects.create(
-            year='2025-2026',
-            start_date=timezone.now().date(),
-            end_date=timezone.now().date() + timedelta(days=365)
-        )
-        self.semester = Semester.objects.create(
-            academic_year=self.academic_year,
-            number=1,
-            start_date=timezone.now().date(),
-            end_date=timezone.now().date() + timedelta(days=180)
-        )
-        
-        # Create subject
-        self.subject = Subject.objects.create(
-            code='CS101',
-            name='Data Structures',
-            department=self.department,
-            semester_number=1,
-            credits=4.0,
-            subject_type='THEORY'
-        )
-        
-        # Create student profile
-        self.student_profile = StudentProfile.objects.create(
-            user=self.student_user,
-            register_number='2025001',
-            section=self.section,
-            semester=self.semester
-        )
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data (reuse from AssignmentTestData)"""
+        super().setUpTestData()
         
         # Create assignment
-        self.assignment = Assignment.objects.create(
-            subject=self.subject,
-            section=self.section,
-            semester=self.semester,
-            created_by=self.faculty_user,
+        cls.assignment = Assignment.objects.create(
+            subject=cls.subject,
+            section=cls.section,
+            semester=cls.semester,
+            created_by=cls.faculty_user,
             title='Test Assignment',
             description='Test description',
             assignment_type='INDIVIDUAL',
@@ -253,9 +207,189 @@ class AssignmentSubmissionModelTest(TestCase):
         )
         
         self.assertTrue(submission.is_late)
+    
+    def test_bulk_create_submissions(self):
+        """Bulk created submissions get is_late and send post_save"""
+        overdue_assignment = Assignment.objects.create(
+            subject=self.subject,
+            section=self.section,
+            semester=self.semester,
+            created_by=self.faculty_user,
+            title='Overdue Assignment',
+            description='Test description',
+            assignment_type='INDIVIDUAL',
+            due_date=timezone.now() - timedelta(days=1),
+            max_marks=100,
+            weightage=10,
+            status='PUBLISHED',
+            allow_late_submission=True,
+            late_submission_deadline=timezone.now() + timedelta(days=2)
+        )
+        
+        saved = []
+        
+        def record_post_save(sender, instance, created, **kwargs):
+            saved.append((instance.pk, created))
+        
+        post_save.connect(record_post_save, sender=AssignmentSubmission)
+        self.addCleanup(post_save.disconnect, record_post_save, sender=AssignmentSubmission)
+        
+        submissions = AssignmentSubmission.bulk_create_submissions([
+            {'assignment_id': self.assignment.id, 'student': self.student_profile, 'submission_text': 'On time'},
+            {'assignment_id': overdue_assignment.id, 'student': self.student_profile, 'submission_text': 'Late'},
+        ])
+        
+        self.assertEqual([submission.is_late for submission in submissions], [False, True])
+        self.assertEqual(
+            AssignmentSubmission.objects.filter(student=self.student_profile).count(), 2
+        )
+        self.assertEqual(saved, [(submission.pk, True) for submission in submissions])
+    
+    def test_bulk_create_submissions_unknown_assignment(self):
+        """Rows for assignments that don't exist are rejected"""
+        missing_id = self.assignment.id + 1000
+        
+        with self.assertRaisesMessage(ValidationError, str(missing_id)):
+            AssignmentSubmission.bulk_create_submissions([
+                {'assignment_id': missing_id, 'student': self.student_profile},
+            ])
+        
+        self.assertFalse(AssignmentSubmission.objects.exists())
+
+
+class AssignmentStatisticsTest(AssignmentTestData):
+    """Test assignment statistics aggregates"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up assignments across the current and a past semester"""
+        super().setUpTestData()
+        
+        cls.semester.is_current = True
+        cls.semester.save()
+        cls.past_semester = Semester.objects.create(
+            academic_year=cls.academic_year,
+            number=2,
+            start_date=timezone.now().date() - timedelta(days=180),
+            end_date=timezone.now().date() - timedelta(days=1)
+        )
+        
+        # Current semester: one overdue, one submitted and graded, one open
+        cls.overdue_assignment = cls.create_assignment('Overdue', due_in_days=-1)
+        cls.graded_assignment = cls.create_assignment('Graded', due_in_days=7)
+        cls.create_assignment('Open', due_in_days=7)
+        # Drafts are not counted
+        cls.create_assignment('Draft', due_in_days=7, status='DRAFT')
+        # Past semester: one overdue
+        cls.create_assignment('Past', due_in_days=-1, semester=cls.past_semester)
+        
+        submission = AssignmentSubmission.objects.create(
+            assignment=cls.graded_assignment,
+            student=cls.student_profile,
+            submission_text='My submission',
+            status='GRADED'
+        )
+        AssignmentGrade.objects.create(
+            submission=submission,
+            marks_obtained=80,
+            graded_by=cls.faculty_user
+        )
+    
+    @classmethod
+    def create_assignment(cls, title, due_in_days, status='PUBLISHED', semester=None):
+        """Create an assignment for the fixture subject and section"""
+        return Assignment.objects.create(
+            subject=cls.subject,
+            section=cls.section,
+            semester=semester or cls.semester,
+            created_by=cls.faculty_user,
+            title=title,
+            description='Test description',
+            assignment_type='INDIVIDUAL',
+            due_date=timezone.now() + timedelta(days=due_in_days),
+            max_marks=100,
+            weightage=10,
+            status=status
+        )
+    
+    def test_student_statistics_current_semester(self):
+        """Defaults to the current semester's published assignments"""
+        stats = get_student_assignment_statistics(self.student_profile)
+        
+        self.assertEqual(stats['total_assignments'], 3)
+        self.assertEqual(stats['total_submitted'], 1)
+        self.assertEqual(stats['pending_submission'], 2)
+        self.assertEqual(stats['graded_count'], 1)
+        self.assertEqual(stats['pending_grading'], 0)
+        self.assertEqual(stats['overdue_count'], 1)
+        self.assertEqual(stats['average_marks'], 80)
+        self.assertEqual(stats['average_percentage'], 80)
+    
+    def test_student_statistics_past_semester(self):
+        """Overdue assignments are counted within the requested semester"""
+        stats = get_student_assignment_statistics(self.student_profile, semester=self.past_semester)
+        
+        self.assertEqual(stats['total_assignments'], 1)
+        self.assertEqual(stats['total_submitted'], 0)
+        self.assertEqual(stats['graded_count'], 0)
+        self.assertEqual(stats['overdue_count'], 1)
+        self.assertEqual(stats['average_marks'], 0)
+    
+    def test_assignment_statistics(self):
+        """Submission counts and averages for one assignment"""
+        stats = get_assignment_statistics(self.graded_assignment)
+        
+        self.assertEqual(stats['total_students'], 1)
+        self.assertEqual(stats['total_submissions'], 1)
+        self.assertEqual(stats['not_submitted'], 0)
+        self.assertEqual(stats['graded_count'], 1)
+        self.assertEqual(stats['pending_grading'], 0)
+        self.assertEqual(stats['late_submissions'], 0)
+        self.assertEqual(stats['average_marks'], 80)
+        self.assertEqual(stats['average_percentage'], 80)
+    
+    def test_assignment_statistics_without_submissions(self):
+        """An assignment nobody submitted has zero averages"""
+        stats = get_assignment_statistics(self.overdue_assignment)
+        
+        self.assertEqual(stats['total_submissions'], 0)
+        self.assertEqual(stats['not_submitted'], 1)
+        self.assertEqual(stats['average_marks'], 0)
 
 
-class AssignmentValidatorTest(TestCase):
+class SectionStudentCountCacheTest(AssignmentTestData):
+    """Test invalidation of the cached section sizes"""
+    
+    def setUp(self):
+        """Start from an empty cache (database rollbacks don't reach it)"""
+        cache.clear()
+    
+    def test_student_moved_between_sections(self):
+        """Both the old and the new section are recounted after a move"""
+        other_section = Section.objects.create(
+            name='CS-B',
+            department=self.department
+        )
+        self.assertEqual(get_active_student_count(self.section.id), 1)
+        self.assertEqual(get_active_student_count(other_section.id), 0)
+        
+        self.student_profile.section = other_section
+        self.student_profile.save()
+        
+        self.assertEqual(get_active_student_count(self.section.id), 0)
+        self.assertEqual(get_active_student_count(other_section.id), 1)
+    
+    def test_student_deactivated(self):
+        """Deactivating a student recounts their section"""
+        self.assertEqual(get_active_student_count(self.section.id), 1)
+        
+        self.student_profile.is_active = False
+        self.student_profile.save()
+        
+        self.assertEqual(get_active_student_count(self.section.id), 0)
+
+
+class AssignmentValidatorTest(SimpleTestCase):
     """Test Assignment validators"""
     
     def test_validate_file_size(self):
@@ -269,4 +403,22 @@ class AssignmentValidatorTest(TestCase):
         pass
 
 
+
+class GradeLetterTest(SimpleTestCase):
+    """Test percentage to letter grade mapping"""
+    
+    def test_grade_letter_boundaries(self):
+        """Each threshold belongs to the higher grade"""
+        self.assertEqual(get_grade_letter(100), 'A+')
+        self.assertEqual(get_grade_letter(90), 'A+')
+        self.assertEqual(get_grade_letter(89.99), 'A')
+        self.assertEqual(get_grade_letter(80), 'A')
+        self.assertEqual(get_grade_letter(70), 'B+')
+        self.assertEqual(get_grade_letter(60), 'B')
+        self.assertEqual(get_grade_letter(50), 'C')
+        self.assertEqual(get_grade_letter(40), 'D')
+        self.assertEqual(get_grade_letter(39.99), 'F')
+        self.assertEqual(get_grade_letter(0), 'F')
+
+
 # Add more tests as needed
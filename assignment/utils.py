@@ -2,8 +2,12 @@
 Utility functions for Assignment System
 """
 from django.utils import timezone
-from django.db.models import Q, Count, Avg, Sum
+from django.db.models import (
+    Q, Count, Avg, Sum, DecimalField, F, FilteredRelation, Exists, OuterRef,
+    BooleanField, Case, Value, When
+)
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 
 def get_active_assignments_for_student(student_profile):
@@ -47,20 +51,21 @@ def get_pending_assignments_for_student(student_profile):
     Returns:
         QuerySet of Assignment
     """
-    from assignment.models import Assignment, AssignmentSubmission
+    from assignment.models import AssignmentSubmission
     
     # Get active assignments
     active_assignments = get_active_assignments_for_student(student_profile)
     
-    # Filter out assignments where submission exists
-    submitted_assignment_ids = AssignmentSubmission.objects.filter(
+    # Filter out assignments where submission exists, as a correlated
+    # NOT EXISTS on the (assignment, student) unique index
+    submitted = AssignmentSubmission.objects.filter(
         student=student_profile,
-        assignment__in=active_assignments
+        assignment=OuterRef('pk')
     ).exclude(
         status='RETURNED'  # Include returned assignments as pending
-    ).values_list('assignment_id', flat=True)
+    )
     
-    return active_assignments.exclude(id__in=submitted_assignment_ids)
+    return active_assignments.filter(~Exists(submitted))
 
 
 def get_overdue_assignments_for_student(student_profile):
@@ -128,40 +133,41 @@ def get_faculty_assignments(faculty_user, semester=None):
     return assignments
 
 
-def get_assignment_statistics(assignment):
+def get_assignment_statistics(assignment, context=None):
     """
     Get statistics for an assignment
     
     Args:
         assignment: Assignment instance
+        context: Optional GraphQL context, memoizes the section size for the request
     
     Returns:
         dict: Statistics including submission count, graded count, etc.
     """
-    from assignment.models import AssignmentSubmission
-    from profile_management.models import StudentProfile
-    
-    # Total students in section
-    total_students = StudentProfile.objects.filter(
-        section=assignment.section,
-        is_active=True
-    ).count()
-    
-    # Submission statistics
-    submissions = assignment.submissions.all()
-    total_submissions = submissions.count()
-    graded_count = submissions.filter(status='GRADED').count()
-    pending_grading = submissions.filter(status__in=['SUBMITTED', 'RESUBMITTED']).count()
-    
-    # Late submissions
-    late_submissions = submissions.filter(is_late=True).count()
+    from assignment.caches import get_active_student_count
+    
+    # Total students in section (already annotated by the list queries)
+    total_students = getattr(assignment, '_section_students', None)
+    if total_students is None:
+        total_students = get_active_student_count(assignment.section_id, context)
+    
+    # Submission statistics in a single aggregate query
+    stats = assignment.submissions.aggregate(
+        total_submissions=Count('id'),
+        graded_count=Count('id', filter=Q(status='GRADED')),
+        pending_grading=Count('id', filter=Q(status__in=['SUBMITTED', 'RESUBMITTED'])),
+        late_submissions=Count('id', filter=Q(is_late=True)),
+        avg_marks=Avg('grade__marks_obtained'),
+    )
+    total_submissions = stats['total_submissions']
+    graded_count = stats['graded_count']
+    pending_grading = stats['pending_grading']
+    late_submissions = stats['late_submissions']
     
     # Average marks (for graded submissions)
     avg_marks = 0
     if graded_count > 0:
-        from assignment.models import AssignmentGrade
-        grades = AssignmentGrade.objects.filter(submission__assignment=assignment)
-        avg_marks = grades.aggregate(Avg('marks_obtained'))['marks_obtained__avg'] or 0
+        avg_marks = stats['avg_marks'] or 0
     
     return {
         'total_students': total_students,
@@ -180,6 +186,9 @@ def get_student_assignment_statistics(student_profile, semester=None):
     """
     Get assignment statistics for a student
     
+    All counts and averages come from a single conditional aggregation over the
+    student's assignments joined to their own submission and grade.
+    
     Args:
         student_profile: StudentProfile instance
         semester: Optional Semester instance to filter by
@@ -187,7 +196,7 @@ def get_student_assignment_statistics(student_profile, semester=None):
     Returns:
         dict: Statistics
     """
-    from assignment.models import Assignment, AssignmentSubmission, AssignmentGrade
+    from assignment.models import Assignment
     
     # Get assignments for student's section
     assignments = Assignment.objects.filter(
@@ -203,59 +212,73 @@ def get_student_assignment_statistics(student_profile, semester=None):
         if current_sem:
             assignments = assignments.filter(semester=current_sem)
     
-    total_assignments = assignments.count()
-    
-    # Get submissions
-    submissions = AssignmentSubmission.objects.filter(
-        student=student_profile,
-        assignment__in=assignments
+    # At most one submission per assignment and student, so this stays one row per assignment
+    graded = Q(student_submission__grade__isnull=False)
+    stats = assignments.annotate(
+        student_submission=FilteredRelation(
+            'submissions',
+            condition=Q(submissions__student=student_profile)
+        )
+    ).aggregate(
+        total_assignments=Count('id'),
+        total_submitted=Count('student_submission'),
+        graded_count=Count('student_submission', filter=Q(student_submission__status='GRADED')),
+        # Not submitted (or returned for revision) and past the due date
+        overdue_count=Count(
+            'id',
+            filter=Q(due_date__lt=timezone.now()) & (
+                Q(student_submission__isnull=True) | Q(student_submission__status='RETURNED')
+            )
+        ),
+        avg_marks=Avg('student_submission__grade__marks_obtained'),
+        weighted_sum=Sum(
+            F('student_submission__grade__marks_obtained') * 100 / F('max_marks') * F('weightage'),
+            filter=graded,
+            output_field=DecimalField()
+        ),
+        total_weightage=Sum('weightage', filter=graded),
     )
     
-    total_submitted = submissions.count()
-    pending_submission = total_assignments - total_submitted
-    
-    # Graded submissions
-    graded_submissions = submissions.filter(status='GRADED').count()
+    total_assignments = stats['total_assignments']
+    total_submitted = stats['total_submitted']
+    graded_submissions = stats['graded_count']
     
     # Average marks
     avg_marks = 0
     avg_percentage = 0
     if graded_submissions > 0:
-        grades = AssignmentGrade.objects.filter(
-            submission__in=submissions
-        )
-        avg_marks = grades.aggregate(Avg('marks_obtained'))['marks_obtained__avg'] or 0
-        
-        # Calculate weighted average percentage
-        total_weightage = 0
-        weighted_sum = 0
-        for grade in grades:
-            percentage = (grade.marks_obtained / grade.submission.assignment.max_marks) * 100
-            weighted_sum += percentage * float(grade.submission.assignment.weightage)
-            total_weightage += float(grade.submission.assignment.weightage)
+        avg_marks = stats['avg_marks'] or 0
         
-        if total_weightage > 0:
-            avg_percentage = weighted_sum / total_weightage
-    
-    # Overdue
-    overdue = get_overdue_assignments_for_student(student_profile)
-    if semester:
-        overdue = overdue.filter(semester=semester)
-    overdue_count = overdue.count()
+        # Weighted average percentage
+        if stats['total_weightage']:
+            avg_percentage = float(stats['weighted_sum']) / float(stats['total_weightage'])
     
     return {
         'total_assignments': total_assignments,
         'total_submitted': total_submitted,
-        'pending_submission': pending_submission,
+        'pending_submission': total_assignments - total_submitted,
         'submission_percentage': (total_submitted / total_assignments * 100) if total_assignments > 0 else 0,
         'graded_count': graded_submissions,
         'pending_grading': total_submitted - graded_submissions,
-        'overdue_count': overdue_count,
+        'overdue_count': stats['overdue_count'],
         'average_marks': round(avg_marks, 2),
         'average_percentage': round(avg_percentage, 2)
     }
 
 
+def _past_final_deadline(now):
+    """Q for assignments whose final (late or regular) deadline has passed"""
+    return (
+        Q(allow_late_submission=False, due_date__lt=now) |
+        Q(allow_late_submission=True, late_submission_deadline__lt=now)
+    )
+
+
+def _due_between(start, end):
+    """Q for assignments due within [start, end]"""
+    return Q(due_date__gte=start, due_date__lte=end)
+
+
 def auto_close_expired_assignments():
     """
     Automatically close assignments that are past their deadline
@@ -272,8 +295,7 @@ def auto_close_expired_assignments():
     expired = Assignment.objects.filter(
         status='PUBLISHED'
     ).filter(
-        Q(allow_late_submission=False, due_date__lt=now) |
-        Q(allow_late_submission=True, late_submission_deadline__lt=now)
+        _past_final_deadline(now)
     )
     
     count = expired.update(status='CLOSED')
@@ -296,12 +318,61 @@ def notify_upcoming_deadlines(days=2):
     future = now + timedelta(days=days)
     
     return Assignment.objects.filter(
-        status='PUBLISHED',
-        due_date__gte=now,
-        due_date__lte=future
+        _due_between(now, future),
+        status='PUBLISHED'
     ).select_related('subject', 'section')
 
 
+def scan_published_assignments(days=2):
+    """
+    Close expired assignments and collect upcoming deadlines in one pass
+    
+    Does the work of auto_close_expired_assignments and notify_upcoming_deadlines
+    for a periodic job with a single read of the published assignments, each
+    row classified in SQL.
+    
+    Args:
+        days: Number of days before deadline to notify
+    
+    Returns:
+        tuple: (number of assignments closed, list of upcoming Assignments)
+    """
+    from assignment.models import Assignment
+    
+    now = timezone.now()
+    future = now + timedelta(days=days)
+    expired_q = _past_final_deadline(now)
+    
+    assignments = Assignment.objects.filter(
+        expired_q | _due_between(now, future),
+        status='PUBLISHED'
+    ).annotate(
+        is_expired=Case(
+            When(expired_q, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    ).select_related('subject', 'section')
+    
+    expired_ids = []
+    upcoming = []
+    for assignment in assignments:
+        if assignment.is_expired:
+            expired_ids.append(assignment.id)
+        else:
+            upcoming.append(assignment)
+    
+    closed = 0
+    if expired_ids:
+        # Status guard: skip rows closed by someone else since the read
+        closed = Assignment.objects.filter(
+            id__in=expired_ids,
+            status='PUBLISHED'
+        ).update(status='CLOSED')
+    
+    return closed, upcoming
+
+
 def generate_assignment_report(assignment):
     """
     Generate detailed report for an assignment
@@ -312,7 +383,7 @@ def generate_assignment_report(assignment):
     Returns:
         dict: Detailed report data
     """
-    from assignment.models import AssignmentGrade
+    from assignment.models import AssignmentGrade, GRADE_LETTERS, GRADE_LETTER_THRESHOLDS
     
     stats = get_assignment_statistics(assignment)
     
@@ -321,20 +392,31 @@ def generate_assignment_report(assignment):
         submission__assignment=assignment
     )
     
-    grade_distribution = {
-        'A+': 0, 'A': 0, 'B+': 0, 'B': 0,
-        'C': 0, 'D': 0, 'F': 0
-    }
-    
-    for grade in grades:
-        letter = grade.grade_letter
-        if letter in grade_distribution:
-            grade_distribution[letter] += 1
+    # Bucket grades in SQL with one conditional count per letter. Letters use
+    # the floored whole percentage, so each threshold is a marks cutoff.
+    grade_distribution = dict.fromkeys(reversed(GRADE_LETTERS), 0)
+    max_marks = assignment.max_marks
+    if max_marks > 0:
+        cutoffs = [Decimal(threshold) * max_marks / 100 for threshold in GRADE_LETTER_THRESHOLDS]
+        buckets = {}
+        for index, (lower, upper) in enumerate(zip([None] + cutoffs, cutoffs + [None])):
+            condition = Q()
+            if lower is not None:
+                condition &= Q(marks_obtained__gte=lower)
+            if upper is not None:
+                condition &= Q(marks_obtained__lt=upper)
+            buckets[f'grade_{index}'] = Count('id', filter=condition)
+        
+        counts = grades.aggregate(**buckets)
+        for index, letter in enumerate(GRADE_LETTERS):
+            grade_distribution[letter] = counts[f'grade_{index}']
+    else:
+        grade_distribution[GRADE_LETTERS[0]] = grades.count()
     
-    # Top performers
+    # Top performers (names are on the student profile, the User model has none)
     top_submissions = grades.order_by('-marks_obtained')[:5].values(
-        'submission__student__user__first_name',
-        'submission__student__user__last_name',
+        'submission__student__first_name',
+        'submission__student__last_name',
         'marks_obtained',
         'submission__student__register_number'
     )
@@ -379,9 +461,10 @@ def check_plagiarism_simple(submission1_text, submission2_text):
     if not words1 or not words2:
         return 0.0
     
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, so the union set is never built
+    common = len(words1 & words2)
+    union = len(words1) + len(words2) - common
     
-    similarity = (len(intersection) / len(union)) * 100 if union else 0
+    similarity = (common / union) * 100 if union else 0
     
     return round(similarity, 2)
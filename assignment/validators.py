@@ -5,6 +5,28 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models import Q
 
+from assignment.models import AssignmentSubmission
+from timetable.models import TimetableEntry
+
+
+# Marks an optional argument the caller hasn't looked up (None is a valid value)
+NOT_LOADED = object()
+
+# Role codes allowed to manage and grade assignments
+FACULTY_ROLES = frozenset({'FACULTY', 'ADMIN', 'HOD'})
+# Role codes that may act on assignments created by someone else
+ADMIN_ROLES = frozenset({'ADMIN', 'HOD'})
+
+
+def _faculty_teaches(subject, section, faculty_user):
+    """Check if a faculty member has an active timetable entry for a subject and section"""
+    return TimetableEntry.objects.filter(
+        subject=subject,
+        section=section,
+        faculty=faculty_user,
+        is_active=True
+    ).exists()
+
 
 class AssignmentValidator:
     """
@@ -12,30 +34,26 @@ class AssignmentValidator:
     """
     
     @staticmethod
-    def validate_assignment_creation(subject, section, due_date, faculty_user):
+    def validate_assignment_creation(subject, section, due_date, faculty_user, teaches=None):
         """
         Validate if faculty can create an assignment
         
         Args:
-            subject: Subject instance
-            section: Section instance
+            subject: Subject instance or ID
+            section: Section instance or ID
             due_date: Due date for assignment
             faculty_user: User instance (faculty)
+            teaches: Whether faculty teaches the subject to the section,
+                if already known (looked up when None)
         
         Returns:
             tuple: (is_valid, error_message)
         """
         # Check if faculty teaches this subject to this section
-        from timetable.models import TimetableEntry
-        
-        teaches_class = TimetableEntry.objects.filter(
-            subject=subject,
-            section=section,
-            faculty=faculty_user,
-            is_active=True
-        ).exists()
+        if teaches is None:
+            teaches = _faculty_teaches(subject, section, faculty_user)
         
-        if not teaches_class:
+        if not teaches:
             return False, "You are not assigned to teach this subject to this section"
         
         # Check if due date is in the future
@@ -79,19 +97,19 @@ class AssignmentValidator:
         return True, ""
     
     @staticmethod
-    def validate_submission(assignment, student_profile):
+    def validate_submission(assignment, student_profile, existing_submission=NOT_LOADED):
         """
         Validate if student can submit assignment
         
         Args:
             assignment: Assignment instance
             student_profile: StudentProfile instance
+            existing_submission: The student's current submission (or None),
+                if already fetched by the caller
         
         Returns:
             tuple: (is_valid, error_message)
         """
-        from assignment.models import AssignmentSubmission
-        
         # Check if assignment is published
         if assignment.status != 'PUBLISHED':
             return False, "Assignment is not published yet"
@@ -100,14 +118,17 @@ class AssignmentValidator:
         if student_profile.section != assignment.section:
             return False, "You are not assigned to this section"
         
-        # Check if already submitted
-        existing_submission = AssignmentSubmission.objects.filter(
-            assignment=assignment,
-            student=student_profile
-        ).first()
-        
-        if existing_submission:
-            if existing_submission.status == 'RETURNED':
+        # Check if already submitted (only the status is needed)
+        if existing_submission is NOT_LOADED:
+            existing_status = AssignmentSubmission.objects.filter(
+                assignment=assignment,
+                student=student_profile
+            ).values_list('status', flat=True).first()
+        else:
+            existing_status = existing_submission.status if existing_submission else None
+        
+        if existing_status:
+            if existing_status == 'RETURNED':
                 # Allow resubmission
                 pass
             else:
@@ -120,7 +141,7 @@ class AssignmentValidator:
         return True, ""
     
     @staticmethod
-    def validate_grading(submission, faculty_user, marks_obtained):
+    def validate_grading(submission, faculty_user, marks_obtained, teaches=None):
         """
         Validate if faculty can grade a submission
         
@@ -128,6 +149,8 @@ class AssignmentValidator:
             submission: AssignmentSubmission instance
             faculty_user: User instance
             marks_obtained: Marks to be awarded
+            teaches: Whether faculty teaches the subject to the section,
+                if already known (looked up when None)
         
         Returns:
             tuple: (is_valid, error_message)
@@ -136,13 +159,8 @@ class AssignmentValidator:
         assignment = submission.assignment
         
         if assignment.created_by.id != faculty_user.id:
-            from timetable.models import TimetableEntry
-            teaches = TimetableEntry.objects.filter(
-                subject=assignment.subject,
-                section=assignment.section,
-                faculty=faculty_user,
-                is_active=True
-            ).exists()
+            if teaches is None:
+                teaches = _faculty_teaches(assignment.subject_id, assignment.section_id, faculty_user)
             
             if not teaches:
                 return False, "You are not authorized to grade this assignment"
@@ -204,7 +222,7 @@ class AssignmentValidator:
         """
         # Check if user is the creator or admin
         if assignment.created_by.id != user.id:
-            if user.role.code not in ['ADMIN', 'HOD']:
+            if user.role.code not in ADMIN_ROLES:
                 return False, "Only the creator or admin can delete this assignment"
         
         # Check if has submissions
@@ -123,6 +123,50 @@ class IsAdmin(strawberry.permission.BasePermission):
         return True
 
 
+def get_role_code(info: Info) -> str:
+    """
+    Get the authenticated user's role code, cached on the context for the request
+    
+    Args:
+        info: Strawberry Info object
+        
+    Returns:
+        str: Role code (e.g., 'STUDENT', 'FACULTY')
+    """
+    context = info.context
+    role_code = getattr(context, '_role_code', None)
+    if role_code is None:
+        role_code = context.request.user.role.code
+        context._role_code = role_code
+    return role_code
+
+
+def get_student_profile(info: Info):
+    """
+    Get the authenticated user's student profile, cached on the context for the request
+    
+    Args:
+        info: Strawberry Info object
+    
+    Returns:
+        StudentProfile: The user's profile, with its section loaded
+    
+    Raises:
+        StudentProfile.DoesNotExist: If the user has no student profile
+    """
+    from profile_management.models import StudentProfile
+    
+    context = info.context
+    if not hasattr(context, '_student_profile'):
+        context._student_profile = StudentProfile.objects.select_related(
+            'section'
+        ).filter(user=context.request.user).first()
+    
+    if context._student_profile is None:
+        raise StudentProfile.DoesNotExist("StudentProfile matching query does not exist.")
+    return context._student_profile
+
+
 def check_role(info: Info, allowed_roles: list) -> bool:
     """
     Check if user has one of the allowed roles
@@ -137,8 +181,7 @@ def check_role(info: Info, allowed_roles: list) -> bool:
     if not is_authenticated(info):
         return False
     
-    user = info.context.request.user
-    return user.role.code in allowed_roles
+    return get_role_code(info) in allowed_roles
 
 
 def require_role(*allowed_roles):
@@ -169,8 +212,7 @@ def require_role(*allowed_roles):
             if not is_authenticated(info):
                 raise Exception("Authentication required")
             
-            user = info.context.request.user
-            if user.role.code not in allowed_roles:
+            if get_role_code(info) not in allowed_roles:
                 raise Exception(f"Access denied. Required roles: {', '.join(allowed_roles)}")
             
             return func(*args, **kwargs)
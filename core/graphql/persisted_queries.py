@@ -0,0 +1,56 @@
+"""
+Automatic Persisted Queries (APQ) for the GraphQL schema
+
+Implements the Apollo APQ protocol:
+https://www.apollographql.com/docs/apollo-server/performance/apq
+
+Clients first send only the SHA-256 hash of a query in
+`extensions.persistedQuery.sha256Hash`. If the hash is unknown the server
+responds with a `PersistedQueryNotFound` error and the client retries with
+both the query and the hash, which registers the query for later requests.
+"""
+import hashlib
+
+from django.core.cache import cache
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+
+PERSISTED_QUERY_CACHE_PREFIX = "graphql:apq:"
+PERSISTED_QUERY_CACHE_TTL = 60 * 60 * 24  # 24 hours
+
+
+class PersistedQueryExtension(SchemaExtension):
+    """Resolve `extensions.persistedQuery` hashes to cached query strings"""
+
+    def on_operation(self):
+        execution_context = self.execution_context
+        persisted_query = (execution_context.operation_extensions or {}).get('persistedQuery')
+
+        if persisted_query:
+            query_hash = persisted_query.get('sha256Hash')
+            if not isinstance(query_hash, str):
+                raise GraphQLError(
+                    "Invalid persisted query",
+                    extensions={"code": "PERSISTED_QUERY_INVALID"},
+                )
+
+            cache_key = f"{PERSISTED_QUERY_CACHE_PREFIX}{query_hash}"
+
+            if execution_context.query:
+                # First request for this query: register it under its hash
+                if hashlib.sha256(execution_context.query.encode()).hexdigest() != query_hash:
+                    raise GraphQLError(
+                        "Provided sha256Hash does not match query",
+                        extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"},
+                    )
+                cache.set(cache_key, execution_context.query, timeout=PERSISTED_QUERY_CACHE_TTL)
+            else:
+                query = cache.get(cache_key)
+                if query is None:
+                    raise GraphQLError(
+                        "PersistedQueryNotFound",
+                        extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+                    )
+                execution_context.query = query
+
+        yield
@@ -1,5 +1,8 @@
 import strawberry
+from strawberry.extensions import ParserCache, ValidationCache
+from strawberry.schema.config import StrawberryConfig
 
+from .persisted_queries import PersistedQueryExtension
 from .queries import Query as CoreQuery
 from .mutations import Mutation as CoreMutation
 from profile_management.graphql.queries import ProfileQuery
@@ -36,4 +39,18 @@ class Mutation(CoreMutation, ProfileMutation, TimetableMutation, AttendanceMutat
 
 
 # Create unified schema
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+# Parsed documents and validation results are LRU-cached by query string,
+# so repeated queries skip GraphQL parsing and validation. Persisted query
+# hashes are resolved to their query string before either cache is consulted.
+# Batched requests (a JSON list of operations) run with one shared context,
+# so auth and the per-request lookup caches are paid once per HTTP request.
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        PersistedQueryExtension,
+        ParserCache(maxsize=1024),
+        ValidationCache(maxsize=1024),
+    ],
+    config=StrawberryConfig(batching_config={"max_operations": 10}),
+)
@@ -1,3 +1,72 @@
-from django.test import TestCase
+"""
+Tests for the core GraphQL schema extensions
+"""
+import hashlib
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.graphql.persisted_queries import PERSISTED_QUERY_CACHE_PREFIX
+from core.graphql.schema import schema
+
+
+QUERY = '{ __typename }'
+QUERY_HASH = hashlib.sha256(QUERY.encode()).hexdigest()
+
+
+def _persisted_query(query_hash):
+    """Build the APQ request extensions for a query hash"""
+    return {'persistedQuery': {'version': 1, 'sha256Hash': query_hash}}
+
+
+class PersistedQueryExtensionTest(SimpleTestCase):
+    """Test Automatic Persisted Queries"""
+
+    def setUp(self):
+        cache.clear()
+
+    def assertErrorCode(self, result, code):
+        """Assert the result failed with a single error of the given APQ code"""
+        self.assertIsNone(result.data)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0].extensions['code'], code)
+
+    def test_unknown_hash(self):
+        """A hash-only request for an unregistered query asks for the query"""
+        result = schema.execute_sync(None, operation_extensions=_persisted_query(QUERY_HASH))
+
+        self.assertErrorCode(result, 'PERSISTED_QUERY_NOT_FOUND')
+        self.assertEqual(result.errors[0].message, 'PersistedQueryNotFound')
+
+    def test_register_then_hit(self):
+        """A query sent with its hash is stored and then served from the hash alone"""
+        result = schema.execute_sync(QUERY, operation_extensions=_persisted_query(QUERY_HASH))
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data, {'__typename': 'Query'})
+        self.assertEqual(cache.get(f'{PERSISTED_QUERY_CACHE_PREFIX}{QUERY_HASH}'), QUERY)
+
+        result = schema.execute_sync(None, operation_extensions=_persisted_query(QUERY_HASH))
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data, {'__typename': 'Query'})
+
+    def test_hash_mismatch(self):
+        """A query whose hash doesn't match is rejected and not stored"""
+        wrong_hash = hashlib.sha256(b'{ other }').hexdigest()
+
+        result = schema.execute_sync(QUERY, operation_extensions=_persisted_query(wrong_hash))
+
+        self.assertErrorCode(result, 'PERSISTED_QUERY_HASH_MISMATCH')
+        self.assertIsNone(cache.get(f'{PERSISTED_QUERY_CACHE_PREFIX}{wrong_hash}'))
+
+    def test_invalid_hash(self):
+        """A persistedQuery without a string hash is rejected"""
+        result = schema.execute_sync(QUERY, operation_extensions={'persistedQuery': {'version': 1}})
+
+        self.assertErrorCode(result, 'PERSISTED_QUERY_INVALID')
+
+    def test_without_persisted_query(self):
+        """Regular requests are not stored"""
+        result = schema.execute_sync(QUERY)
+
+        self.assertEqual(result.data, {'__typename': 'Query'})
+        self.assertIsNone(cache.get(f'{PERSISTED_QUERY_CACHE_PREFIX}{QUERY_HASH}'))
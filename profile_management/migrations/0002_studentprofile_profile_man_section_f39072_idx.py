@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-15 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile_management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['section', 'is_active'], name='profile_man_section_f39072_idx'),
+        ),
+    ]
@@ -204,6 +204,7 @@ class StudentProfile(models.Model):
         indexes = [
             models.Index(fields=['register_number']),
             models.Index(fields=['academic_status']),
+            models.Index(fields=['section', 'is_active']),
         ]
 
     def __str__(self):
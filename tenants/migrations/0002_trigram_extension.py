@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-15 10:00
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        # This app is shared-only, so pg_trgm is created once in the public
+        # schema (tenant schemas skip it and resolve gin_trgm_ops via public).
+        # Requires CREATE on the database (superuser before PostgreSQL 13);
+        # otherwise a superuser must run `CREATE EXTENSION pg_trgm SCHEMA public;`
+        TrigramExtension(),
+    ]
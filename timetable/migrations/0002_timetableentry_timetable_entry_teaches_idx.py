@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-15 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['faculty', 'subject', 'section'], name='timetable_entry_teaches_idx'),
+        ),
+    ]
@@ -316,6 +316,12 @@ class TimetableEntry(models.Model):
             models.Index(fields=['section', 'semester']),
             models.Index(fields=['faculty', 'semester']),
             models.Index(fields=['room', 'period_definition']),
+            # Backs the "does this faculty teach this subject to this section" checks
+            models.Index(
+                fields=['faculty', 'subject', 'section'],
+                condition=models.Q(is_active=True),
+                name='timetable_entry_teaches_idx',
+            ),
         ]
         verbose_name = "Timetable Entry"
         verbose_name_plural = "Timetable Entries"